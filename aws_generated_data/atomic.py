@@ -0,0 +1,61 @@
+"""Atomic file replacement.
+
+Keep this module free of imports of the package, every module writing files
+uses it.
+"""
+
+import contextlib
+import filecmp
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+
+log = logging.getLogger(__name__)
+
+
+@contextlib.contextmanager
+def atomic_file(output: Path, *, unless_unchanged: bool = False) -> Generator[BinaryIO]:
+    """Temporary file replacing output once it is written and synced.
+
+    With unless_unchanged, output is kept as it is if the content is the same.
+    """
+    try:
+        mode = output.stat().st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+    fd, tmp_name = tempfile.mkstemp(dir=output.parent, prefix=f".{output.name}.")
+    tmp = Path(tmp_name)
+    os.fchmod(fd, mode)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+            f.flush()
+            # the data must be on disk before the rename makes it visible
+            os.fsync(f.fileno())
+        _move_into_place(tmp, output, unless_unchanged=unless_unchanged)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _move_into_place(tmp: Path, output: Path, *, unless_unchanged: bool) -> None:
+    if unless_unchanged:
+        if output.exists() and filecmp.cmp(tmp, output, shallow=False):
+            log.info(f"{output} is up to date")
+            tmp.unlink()
+            return
+        log.info(f"Saving to {output} ...")
+    tmp.replace(output)
+
+
+def atomic_write(output: Path, content: str | bytes) -> None:
+    """Replace output with content; readers see either the old or the new file."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    with atomic_file(output) as f:
+        f.write(content)
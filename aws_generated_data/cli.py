@@ -1,21 +1,250 @@
+# ruff: file-ignore[import-outside-top-level]
+import importlib
 import logging
-from typing import Annotated
+from pathlib import Path
+from typing import TYPE_CHECKING, Annotated, NamedTuple
 
 import typer
-from rich.logging import RichHandler
+from typer.core import TyperCommand, TyperGroup
 
-from .commands import msk_eol, rds_eol
+from .defaults import HTTP_BACKOFF_FACTOR, HTTP_RETRIES, HTTP_TIMEOUT
+from .parsing import ParserBackend
 
-app = typer.Typer()
-app.add_typer(rds_eol.app, name="rds-eol", help="RDS End of Life related commands.")
-app.add_typer(msk_eol.app, name="msk-eol", help="MSK End of Life related commands.")
+if TYPE_CHECKING:
+    # typer ships its own copy of click
+    from typer import _click as click
+
+
+class LazyCommand(NamedTuple):
+    module: str
+    help: str
+    # a command group like "rds-eol fetch" or a single command like "query"
+    group: bool = True
+
+
+# the commands pull in bs4, html5lib, requests and pydantic; they are only
+# imported when they run
+LAZY_COMMANDS = {
+    "rds-eol": LazyCommand(
+        "aws_generated_data.commands.rds_eol", "RDS End of Life related commands."
+    ),
+    "msk-eol": LazyCommand(
+        "aws_generated_data.commands.msk_eol", "MSK End of Life related commands."
+    ),
+    "fetch-all": LazyCommand(
+        "aws_generated_data.commands.fetch_all",
+        "Fetch the RDS and MSK EOL data in one go.",
+        group=False,
+    ),
+    "serve": LazyCommand(
+        "aws_generated_data.commands.serve",
+        "Serve the EOL data over HTTP and refresh it periodically.",
+        group=False,
+    ),
+    "query": LazyCommand(
+        "aws_generated_data.commands.query",
+        "Look up EOL dates in an output file.",
+        group=False,
+    ),
+}
+
+
+class LazyGroup(TyperGroup):
+    """Group importing the module of a subcommand only when it is run.
+
+    The help output lists the subcommands with the help texts of
+    LAZY_COMMANDS, without importing them.
+    """
+
+    _listing = False
+
+    def list_commands(self, ctx: click.Context) -> list[str]:
+        return [*super().list_commands(ctx), *LAZY_COMMANDS]
+
+    def get_command(self, ctx: click.Context, cmd_name: str) -> click.Command | None:
+        if not (lazy := LAZY_COMMANDS.get(cmd_name)):
+            return super().get_command(ctx, cmd_name)
+        if self._listing:
+            return TyperCommand(cmd_name, help=lazy.help)
+        group = typer.main.get_group(importlib.import_module(lazy.module).app)
+        if not lazy.group:
+            return group.commands[cmd_name]
+        group.name = cmd_name
+        group.help = lazy.help
+        return group
+
+    def format_help(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        self._listing = True
+        try:
+            super().format_help(ctx, formatter)
+        finally:
+            self._listing = False
+
+
+app = typer.Typer(cls=LazyGroup)
+
+
+def _configure_page_archive(
+    ctx: typer.Context, record: Path | None, replay: Path | None
+) -> None:
+    from .utils import configure_page_archive
+
+    if record and replay:
+        raise typer.BadParameter("Can't record and replay at the same time")
+    try:
+        archive = configure_page_archive(record or replay, replay=bool(replay))
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--replay") from e
+    if archive:
+        ctx.call_on_close(archive.log_stats)
 
 
 @app.callback(no_args_is_help=True)
-def main(*, debug: Annotated[bool, typer.Option(help="Enable debug")] = False) -> None:
+def main(
+    ctx: typer.Context,
+    *,
+    debug: Annotated[bool, typer.Option(help="Enable debug")] = False,
+    cache_dir: Annotated[
+        Path | None,
+        typer.Option(
+            help="Cache directory, e.g. below the mounted output volume",
+            envvar="AGD_CACHE_DIR",
+        ),
+    ] = None,
+    http_retries: Annotated[
+        int,
+        typer.Option(
+            help="Retries for failed HTTP requests (connection errors and 5xx)",
+            envvar="AGD_HTTP_RETRIES",
+            min=0,
+        ),
+    ] = HTTP_RETRIES,
+    http_backoff_factor: Annotated[
+        float,
+        typer.Option(
+            help="Exponential backoff factor between HTTP retries",
+            envvar="AGD_HTTP_BACKOFF_FACTOR",
+            min=0,
+        ),
+    ] = HTTP_BACKOFF_FACTOR,
+    http_timeout: Annotated[
+        float,
+        typer.Option(
+            help="HTTP connect and read timeout in seconds",
+            envvar="AGD_HTTP_TIMEOUT",
+            # requests rejects a timeout of 0 and typer has no min_open
+            min=0.001,
+        ),
+    ] = HTTP_TIMEOUT,
+    engines_config: Annotated[
+        Path | None,
+        typer.Option(
+            help="YAML file describing where the release calendar tables of "
+            "additional sources are",
+            envvar="AGD_ENGINES_CONFIG",
+            exists=True,
+            dir_okay=False,
+        ),
+    ] = None,
+    stream_pages: Annotated[
+        bool,
+        typer.Option(
+            help="Stop downloading a page once its tables are parsed; "
+            "not used with the cache or the page archive",
+            envvar="AGD_STREAM_PAGES",
+        ),
+    ] = False,
+    html_parser: Annotated[
+        ParserBackend,
+        typer.Option(
+            help="HTML parser; html5lib is used as fallback if another parser fails",
+            envvar="AGD_HTML_PARSER",
+        ),
+    ] = ParserBackend.HTML5LIB,
+    profile: Annotated[
+        bool,
+        typer.Option(
+            help="Log the wall and CPU time of each phase per engine",
+            envvar="AGD_PROFILE",
+        ),
+    ] = False,
+    profile_output: Annotated[
+        Path | None,
+        typer.Option(
+            help="Profile the run with cProfile and save the pstats file; "
+            "implies --profile",
+            envvar="AGD_PROFILE_OUTPUT",
+        ),
+    ] = None,
+    parse_processes: Annotated[
+        int,
+        typer.Option(
+            help="Parse the pages in this many processes, while the threads keep "
+            "downloading; 0 parses in the downloading threads",
+            envvar="AGD_PARSE_PROCESSES",
+            min=0,
+        ),
+    ] = 0,
+    record: Annotated[
+        Path | None,
+        typer.Option(
+            help="Record the fetched pages in this page archive",
+            envvar="AGD_RECORD",
+        ),
+    ] = None,
+    replay: Annotated[
+        Path | None,
+        typer.Option(
+            help="Replay the pages from this page archive, without network access",
+            envvar="AGD_REPLAY",
+        ),
+    ] = None,
+    metrics_file: Annotated[
+        Path | None,
+        typer.Option(
+            help="Write Prometheus metrics of the run to this file, e.g. for the "
+            "textfile collector of the node exporter",
+            envvar="AGD_METRICS_FILE",
+        ),
+    ] = None,
+) -> None:
+    from rich.logging import RichHandler
+
+    from .engines import configure_engines
+    from .metrics import configure_metrics
+    from .parse_cache import configure_parse_cache
+    from .parsing import configure_parse_pool, configure_parser
+    from .profiling import configure_profiler
+    from .utils import configure_http_cache, configure_http_session
+
     logging.basicConfig(
         level="DEBUG" if debug else "INFO",
         format="%(name)-20s: %(message)s",
         datefmt="[%X]",
         handlers=[RichHandler()],
     )
+    try:
+        configure_parser(html_parser)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--html-parser") from e
+    try:
+        configure_engines(engines_config)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--engines-config") from e
+    if configure_parse_pool(parse_processes):
+        ctx.call_on_close(lambda: configure_parse_pool(0))
+    configure_http_session(
+        retries=http_retries,
+        backoff_factor=http_backoff_factor,
+        timeout=http_timeout,
+        stream_pages=stream_pages,
+    )
+    _configure_page_archive(ctx, record, replay)
+    if http_cache := configure_http_cache(cache_dir / "http" if cache_dir else None):
+        ctx.call_on_close(http_cache.log_stats)
+    if parse_cache := configure_parse_cache(cache_dir / "parse" if cache_dir else None):
+        ctx.call_on_close(parse_cache.log_stats)
+    if profiler := configure_profiler(enabled=profile, pstats_file=profile_output):
+        ctx.call_on_close(profiler.close)
+    if metrics := configure_metrics(metrics_file):
+        ctx.call_on_close(metrics.write)
@@ -0,0 +1,75 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Annotated, Any
+
+import typer
+
+from aws_generated_data.commands import msk_eol, rds_eol
+from aws_generated_data.output_formats import OutputFormat, output_paths
+
+app = typer.Typer()
+
+
+@app.command(name="fetch-all")
+def fetch_all(
+    engines: rds_eol.EnginesOption,
+    rds_output: rds_eol.OutputOption,
+    msk_release_calendar_url: msk_eol.UrlOption,
+    msk_output: msk_eol.OutputOption,
+    rds_format: Annotated[
+        list[OutputFormat] | None,
+        typer.Option(
+            help="Also write these formats next to the RDS output file",
+            envvar="AGD_RDS_EOL_FORMATS",
+        ),
+    ] = None,
+    msk_format: Annotated[
+        list[OutputFormat] | None,
+        typer.Option(
+            help="Also write these formats next to the MSK output file",
+            envvar="AGD_MSK_EOL_FORMATS",
+        ),
+    ] = None,
+    rds_clean_up_days: rds_eol.CleanUpDaysOption = rds_eol.CLEAN_UP_DAYS,
+    msk_clean_up_days: msk_eol.CleanUpDaysOption = msk_eol.CLEAN_UP_DAYS,
+    max_workers: rds_eol.MaxWorkersOption = rds_eol.MAX_WORKERS,
+    *,
+    rds_shard: rds_eol.ShardOption = False,
+) -> None:
+    """Fetch the RDS and MSK EOL data in one go.
+
+    Both pipelines run concurrently and share the HTTP session; the options
+    and environment variables are the same as for rds-eol and msk-eol fetch.
+    """
+    try:
+        rds_outputs = output_paths(rds_output, rds_format)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--rds-format") from e
+    if rds_shard and not rds_output.suffix:
+        raise typer.BadParameter(
+            "needs an extension with --rds-shard", param_hint="--rds-output"
+        )
+    try:
+        msk_outputs = output_paths(msk_output, msk_format)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--msk-format") from e
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures: list[Future[Any]] = [
+            executor.submit(
+                rds_eol.fetch_rds_eol,
+                engines,
+                rds_outputs,
+                clean_up_days=rds_clean_up_days,
+                max_workers=max_workers,
+                shard=rds_shard,
+            ),
+            executor.submit(
+                msk_eol.fetch_msk_eol,
+                msk_release_calendar_url,
+                msk_outputs,
+                clean_up_days=msk_clean_up_days,
+            ),
+        ]
+    # a failing pipeline doesn't keep the other one from writing its output
+    for future in futures:
+        future.result()
@@ -1,95 +1,122 @@
-import contextlib
 import logging
+import time
 from datetime import (
     UTC,
     datetime,
     timedelta,
 )
 from pathlib import Path
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated
 
 import typer
-from bs4 import BeautifulSoup
 
+from aws_generated_data.engines import CalItem, get_plan
+from aws_generated_data.metrics import set_metric, timer
+from aws_generated_data.output_formats import OutputFormat, output_paths
+from aws_generated_data.profiling import phase
 from aws_generated_data.utils import (
+    ItemMerge,
     VersionItem,
-    filter_items,
     http_get,
-    parse_date,
-    read_output_file,
-    write_output_file,
+    merge_output_files,
+    validate_items,
 )
 
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
 app = typer.Typer()
 log = logging.getLogger(__name__)
 
-CalItem = tuple[str, datetime]
-
 
 def parse_msk_release_calendar(page: str) -> list[CalItem]:
-    items: list[CalItem] = []
-    soup = BeautifulSoup(page, "html5lib")
-    # the first table is the one we want
-    version_table = soup.find("table")
-    if not version_table:
-        raise RuntimeError("Failed to find version table")
+    return get_plan("msk").parse(page, "msk")
 
-    for row in version_table.find_all("tr"):  # type: ignore[union-attr]
-        cols = row.find_all("td")
-        if len(cols) == 3:  # ruff: ignore[magic-value-comparison]
-            date_str = cols[2].text.strip()
-            if date_str == "--":
-                continue
-            with contextlib.suppress(ValueError):
-                items.append((cols[0].text.strip(), parse_date(date_str)))
 
-    if not items:
-        raise RuntimeError("Failed to find any version items")
-    return items
+def get_msk_eol_data(msk_release_calendar_url: str) -> list[VersionItem]:
+    with phase("fetch", "msk"), timer("agd_fetch_duration_seconds", source="msk"):
+        version_page = http_get(
+            msk_release_calendar_url, until=get_plan("msk").scanner()
+        )
+    with phase("parse", "msk"), timer("agd_parse_duration_seconds", source="msk"):
+        calendar = parse_msk_release_calendar(version_page)
+    set_metric("agd_items_parsed", len(calendar), source="msk")
+    with phase("validate", "msk"):
+        return validate_items(
+            VersionItem,
+            [{"version": version, "eol": d.date()} for version, d in calendar],
+        )
 
 
-def get_msk_eol_data(msk_release_calendar_url: str) -> list[VersionItem]:
-    version_page = http_get(msk_release_calendar_url)
-    return [
-        VersionItem(version=version, eol=d.date())
-        for version, d in parse_msk_release_calendar(version_page)
-    ]
+UrlOption = Annotated[
+    str,
+    typer.Option(
+        envvar="AGD_MSK_RELEASE_CALENDAR_URL",
+        help="Url to the MSK release calendar",
+    ),
+]
+OutputOption = Annotated[
+    Path,
+    typer.Option(
+        help="Output file",
+        envvar="AGD_MSK_EOL_OUTPUT",
+    ),
+]
+CleanUpDaysOption = Annotated[
+    int,
+    typer.Option(
+        help="Remove items older than this number of days",
+        envvar="AGD_MSK_CLEAN_UP_DAYS",
+    ),
+]
+CLEAN_UP_DAYS = 365
+
+
+def fetch_msk_eol(
+    msk_release_calendar_url: str,
+    outputs: Sequence[Path],
+    *,
+    clean_up_days: int = CLEAN_UP_DAYS,
+    collect: list[VersionItem] | None = None,
+) -> None:
+    """Fetch the MSK EOL data and merge it into the output files.
+
+    The items written are appended to collect, if given.
+    """
+    log.info(f"Processing {msk_release_calendar_url} ...")
+    msk_data = get_msk_eol_data(msk_release_calendar_url)
+    merge = ItemMerge(
+        msk_data,
+        datetime.now(tz=UTC).date() - timedelta(days=clean_up_days),
+    )
+    # reading, merging, filtering, sorting and writing happen in one pass
+    with phase("merge", "msk"):
+        merge_output_files(outputs, VersionItem, merge, collect=collect)
+    merge.changes.log(outputs[0])
+    set_metric("agd_items_merged", merge.merged, pipeline="msk")
+    set_metric("agd_items_expired", merge.expired, pipeline="msk")
+    set_metric("agd_items_written", merge.merged - merge.expired, pipeline="msk")
+    set_metric("agd_last_success_timestamp_seconds", time.time(), pipeline="msk")
 
 
 @app.command()
 def fetch(
-    msk_release_calendar_url: Annotated[
-        str,
-        typer.Option(
-            envvar="AGD_MSK_RELEASE_CALENDAR_URL",
-            help="Url to the MSK release calendar",
-        ),
-    ],
-    output: Annotated[
-        Path,
-        typer.Option(
-            help="Output file",
-            envvar="AGD_MSK_EOL_OUTPUT",
-        ),
-    ],
-    clean_up_days: Annotated[
-        int,
+    msk_release_calendar_url: UrlOption,
+    output: OutputOption,
+    formats: Annotated[
+        list[OutputFormat] | None,
         typer.Option(
-            help="Remove items older than this number of days",
-            envvar="AGD_MSK_CLEAN_UP_DAYS",
+            "--format",
+            help="Also write these formats next to the output file, e.g. "
+            "msk_eol.json; the output file is the one merged with the new items",
+            envvar="AGD_MSK_EOL_FORMATS",
         ),
-    ] = 365,
+    ] = None,
+    clean_up_days: CleanUpDaysOption = CLEAN_UP_DAYS,
 ) -> None:
     """Fetch RDS EOL data from AWS and saves it to a file."""
-    msk_items_dict = {
-        item.version: item for item in read_output_file(output, VersionItem)
-    }
-    log.info(f"Processing {msk_release_calendar_url} ...")
-    for item in get_msk_eol_data(msk_release_calendar_url):
-        msk_items_dict[item.version] = item
-
-    msk_items = filter_items(
-        msk_items_dict.values(),
-        expired_date=datetime.now(tz=UTC).date() - timedelta(days=clean_up_days),
-    )
-    write_output_file(output, sorted(msk_items, reverse=True))
+    try:
+        outputs = output_paths(output, formats)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--format") from e
+    fetch_msk_eol(msk_release_calendar_url, outputs, clean_up_days=clean_up_days)
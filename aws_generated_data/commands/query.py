@@ -0,0 +1,98 @@
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+from typing import Annotated
+
+import typer
+
+from aws_generated_data.commands.rds_eol import RdsItem
+from aws_generated_data.index import EolIndex
+from aws_generated_data.utils import (
+    VersionItem,
+    read_output_file,
+    read_shard_manifest,
+    validate_items,
+)
+
+app = typer.Typer()
+
+DATE_FORMATS = ["%Y-%m-%d"]
+
+
+def _load_index(output: Path) -> EolIndex[VersionItem]:
+    records = read_output_file(output, dict, strict=True)
+    # RDS files have an engine column, MSK files don't; a row of an RDS file
+    # without one fails the validation instead of turning it into an MSK file
+    item_type = (
+        RdsItem if any("engine" in record for record in records) else VersionItem
+    )
+    return EolIndex(validate_items(item_type, records))
+
+
+@app.command()
+def query(
+    output: Annotated[
+        Path,
+        typer.Argument(
+            help="Output file, in any of the output formats, or a sharded output",
+            dir_okay=False,
+        ),
+    ],
+    engine: Annotated[
+        str | None, typer.Option(help="Only items of this engine, e.g. postgres")
+    ] = None,
+    version: Annotated[
+        str | None,
+        typer.Option(help="Look up a single version; RDS files need --engine too"),
+    ] = None,
+    within_days: Annotated[
+        int | None,
+        typer.Option(help="Only items reaching their EOL in the next days", min=0),
+    ] = None,
+    after: Annotated[
+        datetime | None,
+        typer.Option(
+            help="Only items with an EOL on or after this date", formats=DATE_FORMATS
+        ),
+    ] = None,
+    before: Annotated[
+        datetime | None,
+        typer.Option(
+            help="Only items with an EOL on or before this date", formats=DATE_FORMATS
+        ),
+    ] = None,
+) -> None:
+    """Look up EOL dates in an output file.
+
+    Prints one "[engine] version eol" line per item, ordered by EOL date, and
+    exits with 1 if nothing matches.
+    """
+    if within_days is not None and (after or before):
+        raise typer.BadParameter(
+            "can't be combined with --after or --before", param_hint="--within-days"
+        )
+    if not output.exists() and not read_shard_manifest(output):
+        raise typer.BadParameter(f"{output} does not exist", param_hint="OUTPUT")
+    try:
+        index = _load_index(output)
+    except ValueError:
+        raise typer.BadParameter(
+            f"{output} is not a valid output file", param_hint="OUTPUT"
+        ) from None
+
+    start = after.date() if after else date.min
+    end = before.date() if before else date.max
+    if within_days is not None:
+        # the same day as the EOL cleanup of the fetch commands
+        start = datetime.now(tz=UTC).date()
+        end = start + timedelta(days=within_days)
+
+    if version is not None:
+        item = index.get(engine, version) if engine else index.get(version)
+        items = [item] if item and start <= item.eol <= end else []
+    else:
+        items = index.eol_between(start, end, engine=engine)
+
+    if not items:
+        raise typer.Exit(1)
+    for item in items:
+        typer.echo(f"{' '.join(item.key)} {item.eol}")
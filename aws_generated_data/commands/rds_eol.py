@@ -1,56 +1,64 @@
-import contextlib
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import (
     UTC,
     datetime,
     timedelta,
 )
+from operator import attrgetter
 from pathlib import Path
-from typing import Annotated, Any, cast
+from typing import TYPE_CHECKING, Annotated, Any
 
 import typer
-from bs4 import BeautifulSoup, Tag
 
+from aws_generated_data.engines import CalItem, get_plan
+from aws_generated_data.metrics import set_metric, timer
+from aws_generated_data.output_formats import OutputFormat, output_paths
+from aws_generated_data.profiling import phase
 from aws_generated_data.utils import (
+    ItemMerge,
+    Shard,
     VersionItem,
-    filter_items,
     http_get,
-    parse_date,
+    merge_output_files,
     read_output_file,
-    write_output_file,
+    read_shard_manifest,
+    sort_items,
+    validate_items,
+    version_key,
+    write_sharded_output,
 )
 
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
 app = typer.Typer()
 log = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True, slots=True)
 class RdsItem(VersionItem):
     engine: str
 
+    def _compute_sort_key(self) -> tuple[Any, ...]:
+        return (self.engine, version_key(self.version))
+
+    @property
+    def key(self) -> tuple[str, ...]:
+        return (self.engine, self.version)
+
     def __lt__(self, other: Any) -> bool:  # ruff: ignore[any-type]
         if not isinstance(other, RdsItem):
             return False
-        return (self.engine, self.version) < (other.engine, other.version)
-
-
-CalItem = tuple[str, datetime]
+        return self.sort_key < other.sort_key
 
 
 class Engine:  # ruff: ignore[eq-without-hash]
     def __init__(self, value: str) -> None:
         self.name, self.url = value.split(":", maxsplit=1)
-        match self.name:
-            case "mysql":
-                self.section_id = "MySQL.Concepts.VersionMgmt.Supported"
-                self.table_limit = 2
-            case "postgres":
-                self.section_id = "PostgreSQL.Concepts.VersionMgmt.Supported"
-                self.table_limit = 1
-            case "aurora-postgresql":
-                self.section_id = "aurorapostgresql.minor.versions.supported"
-                self.table_limit = 1
-            case _:
-                raise ValueError(f"Unsupported engine name: {self.name}")
+        self.plan = get_plan(self.name)
 
     def __str__(self) -> str:
         return f"<Engine: {self.name=} {self.url=}>"
@@ -69,80 +77,163 @@ def engine_with_url(value: str) -> Engine:
 
 
 def parse_aws_release_calendar(page: str, engine: Engine) -> list[CalItem]:
-    items: list[CalItem] = []
-    soup = BeautifulSoup(page, "html5lib")
+    return engine.plan.parse(page, engine.name)
 
-    if not (minor_version_section := soup.find(id=engine.section_id)):
-        raise RuntimeError("Failed to find minor version section")
 
-    # the first table in the minor version section is the one we want
-    if not (
-        version_tables := minor_version_section.find_all_next(
-            "table", limit=engine.table_limit
-        )
+def get_rds_eol_data(engine: Engine) -> list[RdsItem]:
+    log.info(f"Processing {engine} ...")
+    with (
+        phase("fetch", engine.name),
+        timer("agd_fetch_duration_seconds", source=engine.name),
     ):
-        raise RuntimeError("Failed to find version table")
-
-    for table in version_tables:
-        table = cast("Tag", table)
-        for row in table.find_all("tr"):
-            cols = row.find_all("td")
-            if len(cols) == 4:  # ruff: ignore[magic-value-comparison]
-                with contextlib.suppress(ValueError):
-                    items.append((
-                        cols[0].text.strip(),
-                        parse_date(cols[3].text.strip()),
-                    ))
-
-    if not items:
-        raise RuntimeError("Failed to find any version items")
-    return items
+        version_page = http_get(engine.url, until=engine.plan.scanner())
+    with (
+        phase("parse", engine.name),
+        timer("agd_parse_duration_seconds", source=engine.name),
+    ):
+        calendar = parse_aws_release_calendar(version_page, engine)
+    set_metric("agd_items_parsed", len(calendar), source=engine.name)
+    with phase("validate", engine.name):
+        return validate_items(
+            RdsItem,
+            [
+                {"engine": engine.name, "version": version, "eol": d.date()}
+                for version, d in calendar
+            ],
+        )
 
 
-def get_rds_eol_data(engine: Engine) -> list[RdsItem]:
-    version_page = http_get(engine.url)
-    return [
-        RdsItem(engine=engine.name, version=version, eol=d.date())
-        for version, d in parse_aws_release_calendar(version_page, engine)
-    ]
+EnginesOption = Annotated[
+    list[Engine],
+    typer.Option(
+        parser=engine_with_url,
+        envvar="AGD_RDS_EOL_ENGINES",
+        help="Engines to sync; format: engine_name:release_calendar_url",
+    ),
+]
+OutputOption = Annotated[
+    Path,
+    typer.Option(
+        help="Output file",
+        envvar="AGD_RDS_EOL_OUTPUT",
+    ),
+]
+CleanUpDaysOption = Annotated[
+    int,
+    typer.Option(
+        help="Remove items older than this number of days",
+        envvar="AGD_RDS_CLEAN_UP_DAYS",
+    ),
+]
+ShardOption = Annotated[
+    bool,
+    typer.Option(
+        help="Write one file per engine plus a manifest to a directory named "
+        "like the output file, e.g. rds_eol/postgres.yaml, and rewrite only the "
+        "engines that changed",
+        envvar="AGD_RDS_EOL_SHARD",
+    ),
+]
+MaxWorkersOption = Annotated[
+    int,
+    typer.Option(
+        help="Number of engines to fetch and parse concurrently",
+        envvar="AGD_MAX_WORKERS",
+        min=1,
+    ),
+]
+CLEAN_UP_DAYS = 1095
+MAX_WORKERS = 4
+
+
+def _shards_by_engine(output: Path) -> dict[str, Shard]:
+    return {shard.name: shard for shard in read_shard_manifest(output).values()}
+
+
+def fetch_rds_eol(
+    engines: Sequence[Engine],
+    outputs: Sequence[Path],
+    *,
+    clean_up_days: int = CLEAN_UP_DAYS,
+    max_workers: int = MAX_WORKERS,
+    shard: bool = False,
+    collect: list[RdsItem] | None = None,
+) -> None:
+    """Fetch the EOL data of engines and merge it into the output files.
+
+    With shard, only the shards of engines and those with expired items are
+    rewritten. The items written are appended to collect, if given.
+    """
+    expired_date = datetime.now(tz=UTC).date() - timedelta(days=clean_up_days)
+    new_items: list[RdsItem] = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # map() yields the results in the order of engines, regardless of which
+        # engine finishes first. This keeps the merge below deterministic.
+        for engine_items in executor.map(get_rds_eol_data, engines):
+            new_items += engine_items
+    merge = ItemMerge(new_items, expired_date)
+    # reading, merging, filtering, sorting and writing happen in one pass
+    with phase("merge", "rds"):
+        if shard:
+            rds_items = _merge_shards(engines, outputs, merge)
+            if collect is not None:
+                collect += rds_items
+        else:
+            merge_output_files(outputs, RdsItem, merge, collect=collect)
+    merge.changes.log(outputs[0])
+    set_metric("agd_items_merged", merge.merged, pipeline="rds")
+    set_metric("agd_items_expired", merge.expired, pipeline="rds")
+    set_metric("agd_items_written", merge.merged - merge.expired, pipeline="rds")
+    set_metric("agd_last_success_timestamp_seconds", time.time(), pipeline="rds")
+
+
+def _merge_shards(
+    engines: Sequence[Engine], outputs: Sequence[Path], merge: ItemMerge[RdsItem]
+) -> list[RdsItem]:
+    loaded = {engine.name for engine in engines} | {
+        name
+        for name, shard_info in _shards_by_engine(outputs[0]).items()
+        if shard_info.min_eol <= merge.expired_date
+    }
+    # the shards are small, they are merged in memory
+    previous_items = read_output_file(outputs[0], RdsItem, shards=loaded, strict=True)
+    rds_items = list(merge(sort_items(previous_items)))
+    for path in outputs:
+        write_sharded_output(path, rds_items, attrgetter("engine"), loaded=loaded)
+    return rds_items
 
 
 @app.command()
 def fetch(
-    engines: Annotated[
-        list[Engine],
-        typer.Option(
-            parser=engine_with_url,
-            envvar="AGD_RDS_EOL_ENGINES",
-            help="Engines to sync; format: engine_name:release_calendar_url",
-        ),
-    ],
-    output: Annotated[
-        Path,
-        typer.Option(
-            help="Output file",
-            envvar="AGD_RDS_EOL_OUTPUT",
-        ),
-    ],
-    clean_up_days: Annotated[
-        int,
+    engines: EnginesOption,
+    output: OutputOption,
+    formats: Annotated[
+        list[OutputFormat] | None,
         typer.Option(
-            help="Remove items older than this number of days",
-            envvar="AGD_RDS_CLEAN_UP_DAYS",
+            "--format",
+            help="Also write these formats next to the output file, e.g. "
+            "rds_eol.json; the output file is the one merged with the new items",
+            envvar="AGD_RDS_EOL_FORMATS",
         ),
-    ] = 1095,
+    ] = None,
+    clean_up_days: CleanUpDaysOption = CLEAN_UP_DAYS,
+    max_workers: MaxWorkersOption = MAX_WORKERS,
+    *,
+    shard: ShardOption = False,
 ) -> None:
     """Fetch RDS EOL data from AWS and saves it to a file."""
-    rds_items_dict = {
-        (item.engine, item.version): item for item in read_output_file(output, RdsItem)
-    }
-    for engine in engines:
-        log.info(f"Processing {engine} ...")
-        for item in get_rds_eol_data(engine):
-            rds_items_dict[item.engine, item.version] = item
-
-    rds_items = filter_items(
-        rds_items_dict.values(),
-        expired_date=datetime.now(tz=UTC).date() - timedelta(days=clean_up_days),
+    try:
+        outputs = output_paths(output, formats)
+    except ValueError as e:
+        raise typer.BadParameter(str(e), param_hint="--format") from e
+    if shard and not output.suffix:
+        raise typer.BadParameter(
+            "needs an extension with --shard", param_hint="--output"
+        )
+    fetch_rds_eol(
+        engines,
+        outputs,
+        clean_up_days=clean_up_days,
+        max_workers=max_workers,
+        shard=shard,
     )
-    write_output_file(output, sorted(rds_items, reverse=True))
@@ -0,0 +1,250 @@
+import functools
+import hashlib
+import json
+import logging
+import threading
+from datetime import UTC, datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Annotated, Any
+
+import typer
+
+from aws_generated_data.commands import msk_eol, rds_eol
+from aws_generated_data.commands.rds_eol import RdsItem
+from aws_generated_data.metrics import save_metrics
+from aws_generated_data.output_formats import SUFFIXES, OutputFormat
+from aws_generated_data.profiling import save_profile
+from aws_generated_data.utils import VersionItem, dump_items, read_output_file
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+app = typer.Typer()
+log = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = 6 * 60 * 60
+PORT = 8080
+
+
+class Dataset:
+    """Latest items of a pipeline, serialized on demand for each format."""
+
+    def __init__(self, name: str, refresh: Callable[[], Sequence[Any]]) -> None:
+        self.name = name
+        self.refresh = refresh
+        self.updated_at: datetime | None = None
+        self.error: str | None = None
+        self._items: Sequence[Any] = []
+        # the serialized items and their ETag by format
+        self._bodies: dict[OutputFormat, tuple[bytes, str]] = {}
+        self._lock = threading.Lock()
+
+    def update(self, items: Sequence[Any]) -> None:
+        with self._lock:
+            self._items = items
+            self._bodies = {}
+            self.updated_at = datetime.now(tz=UTC)
+            self.error = None
+
+    def fail(self, error: str) -> None:
+        """Record error in the status, the items served stay as they are."""
+        with self._lock:
+            self.error = error
+
+    def body(self, fmt: OutputFormat) -> tuple[bytes, str]:
+        with self._lock:
+            if fmt not in self._bodies:
+                body = dump_items(self._items, fmt)
+                etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+                self._bodies[fmt] = (body, etag)
+            return self._bodies[fmt]
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "updated_at": self.updated_at.isoformat() if self.updated_at else None,
+                "error": self.error,
+            }
+
+    def run_refresh(self) -> None:
+        try:
+            items = self.refresh()
+        except Exception as e:
+            # keep serving the previous items
+            log.exception(f"Failed to refresh {self.name}")
+            self.fail(str(e))
+        else:
+            self.update(items)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header value matches etag.
+
+    The header is "*" or a comma-separated list of entity tags, which are
+    compared weakly (RFC 9110), i.e. W/"x" matches "x".
+    """
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+class SnapshotServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], datasets: Sequence[Dataset]) -> None:
+        super().__init__(address, SnapshotHandler)
+        self.datasets = {dataset.name: dataset for dataset in datasets}
+
+
+class SnapshotHandler(BaseHTTPRequestHandler):
+    """GET /<dataset><suffix>, e.g. /rds_eol.json, and /status."""
+
+    server: SnapshotServer
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0].lstrip("/")
+        if path == "status":
+            status = {
+                name: dataset.status() for name, dataset in self.server.datasets.items()
+            }
+            self._send(json.dumps(status, indent=2).encode(), "application/json")
+            return
+        name, dot, suffix = path.rpartition(".")
+        dataset = self.server.datasets.get(name)
+        fmt = SUFFIXES.get(f"{dot}{suffix}")
+        if not dataset or not fmt or not fmt.available:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        if not dataset.updated_at:
+            self.send_error(HTTPStatus.SERVICE_UNAVAILABLE, "Not loaded yet")
+            return
+        body, etag = dataset.body(fmt)
+        if etag_matches(self.headers.get("if-none-match", ""), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("etag", etag)
+            self.end_headers()
+            return
+        self._send(body, fmt.media_type, etag)
+
+    def _send(self, body: bytes, content_type: str, etag: str | None = None) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("content-type", content_type)
+        self.send_header("content-length", str(len(body)))
+        if etag:
+            self.send_header("etag", etag)
+            # clients revalidate with If-None-Match on every poll
+            self.send_header("cache-control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:  # ruff: ignore[builtin-argument-shadowing, any-type]
+        log.debug(f"{self.address_string()} {format % args}")
+
+
+def collect_items(
+    fetch: Callable[..., None],
+    *args: Any,  # ruff: ignore[any-type]
+    **kwargs: Any,  # ruff: ignore[any-type]
+) -> list[Any]:
+    """Run a fetch_*_eol function and return the items it wrote."""
+    items: list[Any] = []
+    fetch(*args, collect=items, **kwargs)
+    return items
+
+
+def refresh_loop(
+    datasets: Sequence[Dataset], interval: float, stop: threading.Event
+) -> None:
+    """Refresh datasets every interval seconds until stop is set."""
+    while not stop.is_set():
+        for dataset in datasets:
+            dataset.run_refresh()
+        # the process never exits, flush the results of this round now
+        save_metrics()
+        save_profile()
+        log.info(f"Next refresh in {interval:g} seconds")
+        stop.wait(interval)
+
+
+@app.command()
+def serve(
+    engines: rds_eol.EnginesOption,
+    rds_output: rds_eol.OutputOption,
+    msk_release_calendar_url: msk_eol.UrlOption,
+    msk_output: msk_eol.OutputOption,
+    host: Annotated[
+        str, typer.Option(help="Address to listen on", envvar="AGD_SERVE_HOST")
+    ] = "127.0.0.1",
+    port: Annotated[
+        int, typer.Option(help="Port to listen on", envvar="AGD_SERVE_PORT", min=0)
+    ] = PORT,
+    refresh_interval: Annotated[
+        float,
+        typer.Option(
+            help="Seconds between the refreshes of the data",
+            envvar="AGD_REFRESH_INTERVAL",
+            min=1,
+        ),
+    ] = REFRESH_INTERVAL,
+    rds_clean_up_days: rds_eol.CleanUpDaysOption = rds_eol.CLEAN_UP_DAYS,
+    msk_clean_up_days: msk_eol.CleanUpDaysOption = msk_eol.CLEAN_UP_DAYS,
+    max_workers: rds_eol.MaxWorkersOption = rds_eol.MAX_WORKERS,
+) -> None:
+    """Serve the EOL data over HTTP and refresh it periodically.
+
+    The items are served as /rds_eol.<format> and /msk_eol.<format>, e.g.
+    /rds_eol.json, with an ETag; /status shows when they were refreshed. Each
+    refresh updates the output files like fetch-all.
+    """
+    datasets = [
+        Dataset(
+            "rds_eol",
+            functools.partial(
+                collect_items,
+                rds_eol.fetch_rds_eol,
+                engines,
+                [rds_output],
+                clean_up_days=rds_clean_up_days,
+                max_workers=max_workers,
+            ),
+        ),
+        Dataset(
+            "msk_eol",
+            functools.partial(
+                collect_items,
+                msk_eol.fetch_msk_eol,
+                msk_release_calendar_url,
+                [msk_output],
+                clean_up_days=msk_clean_up_days,
+            ),
+        ),
+    ]
+    # serve the previous output files until the first refresh is done
+    for dataset, output, item_type in (
+        (datasets[0], rds_output, RdsItem),
+        (datasets[1], msk_output, VersionItem),
+    ):
+        if not output.exists():
+            continue
+        try:
+            dataset.update(read_output_file(output, item_type, strict=True))
+        except ValueError as e:
+            # not loaded, instead of serving no items as if that were the data
+            log.warning(str(e))
+            dataset.fail(str(e))
+
+    server = SnapshotServer((host, port), datasets)
+    stop = threading.Event()
+    refresher = threading.Thread(
+        target=refresh_loop, args=(datasets, refresh_interval, stop), daemon=True
+    )
+    refresher.start()
+    log.info(f"Serving on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log.info("Shutting down")
+    finally:
+        stop.set()
+        server.server_close()
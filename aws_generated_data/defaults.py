@@ -0,0 +1,10 @@
+"""Defaults of the CLI options.
+
+Keep this module free of heavy imports, the CLI imports it on startup.
+"""
+
+# be nice to docs.aws.amazon.com, even when many pages are fetched concurrently
+MAX_CONNECTIONS_PER_HOST = 4
+HTTP_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.5
+HTTP_TIMEOUT = 60.0
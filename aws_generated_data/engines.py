@@ -0,0 +1,124 @@
+import contextlib
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import yaml
+from pydantic import ConfigDict, TypeAdapter
+
+from aws_generated_data.parse_cache import CacheKey, cached_parse
+from aws_generated_data.parsing import Table, TableScanner, parse_tables
+from aws_generated_data.utils import parse_date
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+CalItem = tuple[str, datetime]
+
+
+@dataclass(frozen=True, slots=True)
+class ExtractionPlan:
+    """Where the release calendar tables of a source are and how to read them.
+
+    The first table_limit tables after the element with id section_id (or the
+    first tables of the page without one) are read. Rows with row_width cells
+    hold a version and its EOL date. A plan is immutable and picklable, so it
+    is validated once and can be passed to the parse pool as extract function.
+    """
+
+    # a misspelled field in an engines config must not fall back to a default
+    __pydantic_config__ = ConfigDict(extra="forbid")
+
+    section_id: str | None = None
+    table_limit: int = 1
+    version_column: int = 0
+    date_column: int = 3
+    row_width: int = 4
+
+    def __post_init__(self) -> None:
+        if self.table_limit < 1:
+            raise ValueError("table_limit must be at least 1")
+        if not min(self.version_column, self.date_column) >= 0:
+            raise ValueError("Column indices must not be negative")
+        if max(self.version_column, self.date_column) >= self.row_width:
+            raise ValueError("Column indices must be smaller than row_width")
+
+    @property
+    def key(self) -> CacheKey:
+        return tuple(getattr(self, field.name) for field in fields(self))
+
+    def __call__(self, tables: list[Table]) -> list[CalItem]:
+        items: list[CalItem] = []
+        for table in tables:
+            for cols in table:
+                if len(cols) == self.row_width:
+                    with contextlib.suppress(ValueError):
+                        items.append((
+                            cols[self.version_column],
+                            parse_date(cols[self.date_column]),
+                        ))
+
+        if not items:
+            raise RuntimeError("Failed to find any version items")
+        return items
+
+    def scanner(self) -> TableScanner:
+        """Scanner telling when the tables of this plan are downloaded."""
+        return TableScanner(self.table_limit, self.section_id)
+
+    def parse(self, page: str, name: str) -> list[CalItem]:
+        """Extract the calendar items of source name from page."""
+        return cached_parse(
+            page,
+            (name, *self.key),
+            lambda: parse_tables(
+                page,
+                table_limit=self.table_limit,
+                extract=self,
+                section_id=self.section_id,
+            ),
+        )
+
+
+BUILTIN_PLANS = {
+    "mysql": ExtractionPlan("MySQL.Concepts.VersionMgmt.Supported", table_limit=2),
+    "postgres": ExtractionPlan("PostgreSQL.Concepts.VersionMgmt.Supported"),
+    "aurora-postgresql": ExtractionPlan("aurorapostgresql.minor.versions.supported"),
+    # the first table of the MSK page is the one we want
+    "msk": ExtractionPlan(date_column=2, row_width=3),
+}
+
+_plans = dict(BUILTIN_PLANS)
+_plans_adapter = TypeAdapter(dict[str, ExtractionPlan])
+
+
+def configure_engines(config: Path | None) -> dict[str, ExtractionPlan]:
+    """Add (or override) the plans of the sources defined in config.
+
+    config is a YAML mapping of source names to ExtractionPlan fields, e.g.
+
+        mariadb:
+          section_id: id-of-the-element-above-the-tables
+          table_limit: 1
+          version_column: 0
+          date_column: 3
+          row_width: 4
+
+    Raises ValueError if config can't be read or is invalid.
+    """
+    global _plans  # ruff: ignore[global-statement]
+    _plans = dict(BUILTIN_PLANS)
+    if config:
+        try:
+            data = yaml.safe_load(config.read_text(encoding="utf-8"))
+        except (OSError, yaml.YAMLError) as e:
+            raise ValueError(f"Failed to load {config}: {e}") from e
+        _plans |= _plans_adapter.validate_python(data or {})
+    return _plans
+
+
+def get_plan(name: str) -> ExtractionPlan:
+    try:
+        return _plans[name]
+    except KeyError:
+        raise ValueError(f"Unsupported engine name: {name}") from None
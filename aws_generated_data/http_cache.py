@@ -0,0 +1,84 @@
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING
+
+from aws_generated_data.atomic import atomic_write
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    body: str
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers to revalidate this entry."""
+        headers = {}
+        if self.etag:
+            headers["if-none-match"] = self.etag
+        if self.last_modified:
+            headers["if-modified-since"] = self.last_modified
+        return headers
+
+
+class HttpCache:
+    """On-disk HTTP cache revalidated with ETag/Last-Modified.
+
+    Only responses carrying a validator are stored, everything else is always
+    downloaded again.
+    """
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode()).hexdigest()}.json"
+
+    def get(self, url: str) -> CacheEntry | None:
+        try:
+            entry = CacheEntry(
+                **json.loads(self._path(url).read_text(encoding="utf-8"))
+            )
+        except FileNotFoundError:
+            return None
+        except TypeError, ValueError:
+            log.warning(f"Ignoring corrupt HTTP cache entry for {url}")
+            return None
+        # protect against (very unlikely) hash collisions
+        return entry if entry.url == url else None
+
+    def store(self, entry: CacheEntry) -> None:
+        if not entry.etag and not entry.last_modified:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        atomic_write(self._path(entry.url), json.dumps(asdict(entry)))
+
+    def record_hit(self, entry: CacheEntry) -> None:
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(entry.body.encode("utf-8"))
+        log.debug(f"HTTP cache hit: {entry.url}")
+
+    def record_miss(self, url: str) -> None:
+        with self._lock:
+            self.misses += 1
+        log.debug(f"HTTP cache miss: {url}")
+
+    def log_stats(self) -> None:
+        log.info(
+            f"HTTP cache: {self.hits} hits, {self.misses} misses, "
+            f"{self.bytes_saved} bytes saved"
+        )
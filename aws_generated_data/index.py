@@ -0,0 +1,90 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import UTC, date, datetime, timedelta
+from typing import TYPE_CHECKING, TypeVar
+
+from aws_generated_data.utils import Keyed, read_output_file
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from pathlib import Path
+
+KeyedType = TypeVar("KeyedType", bound=Keyed)
+
+
+def _eol_order(item: Keyed) -> tuple[date, tuple[str, ...]]:
+    return (item.eol, item.key)
+
+
+class EolIndex[KeyedType: Keyed]:
+    """In-memory index of the items of an output file.
+
+    Point lookups by key (engine and version) use a dict. EOL range queries
+    bisect per-engine lists sorted by EOL date, i.e. O(log n + k).
+    """
+
+    def __init__(self, items: Iterable[KeyedType]) -> None:
+        self._items = {item.key: item for item in items}
+        engines: dict[tuple[str, ...], list[KeyedType]] = defaultdict(list)
+        for item in self._items.values():
+            # the key without the version, () for files without engines (MSK)
+            engines[item.key[:-1]].append(item)
+        self._by_eol = {
+            engine: sorted(group, key=_eol_order) for engine, group in engines.items()
+        }
+        self._eols = {
+            engine: [item.eol for item in group]
+            for engine, group in self._by_eol.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def engines(self) -> list[str]:
+        return sorted(" ".join(engine) for engine in self._by_eol if engine)
+
+    def get(self, *key: str) -> KeyedType | None:
+        """Look up an item by key, e.g. get("postgres", "16.4") or get("3.7.x")."""
+        return self._items.get(key)
+
+    def eol_between(
+        self,
+        start: date | None = None,
+        end: date | None = None,
+        *,
+        engine: str | None = None,
+    ) -> list[KeyedType]:
+        """Items with an EOL date in [start, end], ordered by EOL date.
+
+        Without engine, the items of all engines are returned.
+        """
+        engines = [(engine,)] if engine is not None else list(self._by_eol)
+        ranges = []
+        for key in engines:
+            if key not in self._eols:
+                continue
+            eols = self._eols[key]
+            lo = bisect_left(eols, start) if start else 0
+            hi = bisect_right(eols, end) if end else len(eols)
+            ranges.append(self._by_eol[key][lo:hi])
+        return list(heapq.merge(*ranges, key=_eol_order))
+
+    def expiring(
+        self, days: int, *, today: date | None = None, engine: str | None = None
+    ) -> list[KeyedType]:
+        """Items reaching their EOL in the next days (from today in UTC)."""
+        today = today or datetime.now(tz=UTC).date()
+        return self.eol_between(today, today + timedelta(days=days), engine=engine)
+
+
+def load_index[KeyedType: Keyed](
+    path: Path, item_type: type[KeyedType]
+) -> EolIndex[KeyedType]:
+    """Build an index from an output file in any of the output formats.
+
+    All shards of a sharded output (see write_sharded_output) are loaded.
+    Raises ValueError if the file can't be loaded as item_type.
+    """
+    return EolIndex(read_output_file(path, item_type, strict=True))
@@ -0,0 +1,118 @@
+import contextlib
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING
+
+from aws_generated_data.atomic import atomic_write
+
+if TYPE_CHECKING:
+    from collections.abc import Generator
+    from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+# name: help text; all metrics are gauges describing the last run
+METRICS = {
+    "agd_http_request_duration_seconds": "Duration of the last HTTP request",
+    "agd_http_response_bytes": "Size of the last HTTP response body",
+    "agd_http_status": "Status code of the last HTTP response",
+    "agd_http_bytes_avoided": "Bytes not downloaded because the tables were complete",
+    "agd_fetch_duration_seconds": "Time spent fetching the release calendar",
+    "agd_parse_duration_seconds": "Time spent parsing the release calendar",
+    "agd_items_parsed": "Items parsed from the release calendar",
+    "agd_items_merged": "Items after merging the parsed items into the output",
+    "agd_items_expired": "Items removed because their EOL is too old",
+    "agd_items_written": "Items written to the output files",
+    "agd_last_success_timestamp_seconds": "Unix time of the last successful run",
+}
+# kept from the previous metrics file if this run failed
+CARRIED_OVER = ("agd_last_success_timestamp_seconds",)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _series(name: str, labels: Labels) -> str:
+    if not labels:
+        return name
+    label_str = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return f"{name}{{{label_str}}}"
+
+
+class Metrics:
+    """Metrics of a run, saved in the Prometheus textfile format.
+
+    The file is meant for the textfile collector of the node exporter, so it
+    is replaced atomically.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.samples: dict[tuple[str, Labels], float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, name: str, value: float, **labels: str) -> None:
+        if name not in METRICS:
+            raise ValueError(f"Unknown metric: {name}")
+        with self._lock:
+            self.samples[name, tuple(sorted(labels.items()))] = value
+
+    def render(self) -> str:
+        # series: sample line, by metric
+        samples: dict[str, dict[str, str]] = {name: {} for name in METRICS}
+        with contextlib.suppress(FileNotFoundError):
+            for line in self.path.read_text(encoding="utf-8").splitlines():
+                series = line.rsplit(" ", 1)[0]
+                name = series.split("{", 1)[0]
+                if name in CARRIED_OVER:
+                    samples[name][series] = line
+        with self._lock:
+            for (name, labels), value in self.samples.items():
+                series = _series(name, labels)
+                samples[name][series] = f"{series} {value}"
+
+        lines = []
+        for name, help_text in METRICS.items():
+            if samples[name]:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+                lines += [samples[name][series] for series in sorted(samples[name])]
+        return "".join(f"{line}\n" for line in lines)
+
+    def write(self) -> None:
+        atomic_write(self.path, self.render())
+        log.info(f"Saved the metrics to {self.path}")
+
+
+_metrics: Metrics | None = None
+
+
+def configure_metrics(path: Path | None) -> Metrics | None:
+    """Enable (or disable with None) the metrics recorded by set_metric()."""
+    global _metrics  # ruff: ignore[global-statement]
+    _metrics = Metrics(path) if path else None
+    return _metrics
+
+
+def save_metrics() -> None:
+    """Write the metrics file now, e.g. after each refresh of a long run."""
+    if _metrics:
+        _metrics.write()
+
+
+def set_metric(name: str, value: float, **labels: str) -> None:
+    if _metrics:
+        _metrics.set(name, value, **labels)
+
+
+@contextlib.contextmanager
+def timer(name: str, **labels: str) -> Generator[None]:
+    """Set metric name to the duration of the block."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        set_metric(name, time.perf_counter() - start, **labels)
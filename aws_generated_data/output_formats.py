@@ -0,0 +1,253 @@
+import importlib.util
+import json
+import textwrap
+from datetime import date
+from enum import StrEnum
+from typing import TYPE_CHECKING, Any
+
+import yaml
+
+try:
+    # libyaml bindings are much faster than the pure Python implementation
+    from yaml import CSafeDumper as YamlDumper
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeDumper as YamlDumper  # type: ignore[assignment]
+    from yaml import SafeLoader as YamlLoader  # type: ignore[assignment]
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator, Sequence
+    from pathlib import Path
+    from typing import BinaryIO
+
+Record = dict[str, Any]
+
+
+class OutputFormat(StrEnum):
+    YAML = "yaml"
+    JSON = "json"
+    JSONL = "jsonl"
+    PARQUET = "parquet"
+    ARROW = "arrow"
+
+    @classmethod
+    def from_path(cls, path: Path) -> OutputFormat:
+        """Format of path by its extension, YAML for unknown extensions."""
+        return SUFFIXES.get(path.suffix.lower(), cls.YAML)
+
+    @property
+    def suffix(self) -> str:
+        return f".{self.value}"
+
+    @property
+    def columnar(self) -> bool:
+        return self in {OutputFormat.PARQUET, OutputFormat.ARROW}
+
+    @property
+    def available(self) -> bool:
+        return not self.columnar or importlib.util.find_spec("pyarrow") is not None
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self]
+
+
+SUFFIXES = {
+    ".yaml": OutputFormat.YAML,
+    ".yml": OutputFormat.YAML,
+    ".json": OutputFormat.JSON,
+    ".jsonl": OutputFormat.JSONL,
+    ".ndjson": OutputFormat.JSONL,
+    ".parquet": OutputFormat.PARQUET,
+    ".arrow": OutputFormat.ARROW,
+    ".feather": OutputFormat.ARROW,
+}
+MEDIA_TYPES = {
+    OutputFormat.YAML: "application/yaml",
+    OutputFormat.JSON: "application/json",
+    OutputFormat.JSONL: "application/jsonl",
+    OutputFormat.PARQUET: "application/vnd.apache.parquet",
+    OutputFormat.ARROW: "application/vnd.apache.arrow.file",
+}
+
+
+def output_paths(output: Path, formats: Sequence[OutputFormat] | None) -> list[Path]:
+    """The files to write: output itself, then one file per other format next to it.
+
+    output is the first path, the one read back to merge with the new items,
+    even if formats doesn't include its format; otherwise a --format json
+    next to an existing .yaml output would start over without its history.
+    """
+    output_format = OutputFormat.from_path(output)
+    paths = [output] + [
+        output.with_suffix(fmt.suffix)
+        for fmt in dict.fromkeys(formats or [])
+        if fmt is not output_format
+    ]
+    for path in paths:
+        if not (fmt := OutputFormat.from_path(path)).available:
+            raise ValueError(f"Output format {fmt} requires pyarrow")
+    return paths
+
+
+def _json_default(value: Any) -> str:  # ruff: ignore[any-type]
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _arrow_table(records: Sequence[Record]) -> Any:  # ruff: ignore[any-type]
+    import pyarrow as pa  # ruff: ignore[import-outside-top-level]
+
+    # sorted columns, like the keys in the YAML and JSON files
+    return pa.Table.from_pylist([dict(sorted(record.items())) for record in records])
+
+
+def dump(records: Sequence[Record], fmt: OutputFormat) -> bytes:
+    """Serialize records in format fmt."""
+    if not fmt.available:
+        raise RuntimeError(f"Output format {fmt} requires pyarrow")
+    match fmt:
+        case OutputFormat.YAML:
+            return yaml.dump(
+                records,
+                Dumper=YamlDumper,
+                explicit_start=True,
+                indent=2,
+                default_flow_style=False,
+            ).encode("utf-8")
+        case OutputFormat.JSON:
+            return (
+                json.dumps(records, indent=2, sort_keys=True, default=_json_default)
+                + "\n"
+            ).encode("utf-8")
+        case OutputFormat.JSONL:
+            return "".join(
+                json.dumps(record, sort_keys=True, default=_json_default) + "\n"
+                for record in records
+            ).encode("utf-8")
+        case OutputFormat.PARQUET:
+            import pyarrow as pa  # ruff: ignore[import-outside-top-level]
+            import pyarrow.parquet as pq  # ruff: ignore[import-outside-top-level]
+
+            sink = pa.BufferOutputStream()
+            pq.write_table(_arrow_table(records), sink)
+            return sink.getvalue().to_pybytes()
+        case OutputFormat.ARROW:
+            import pyarrow as pa  # ruff: ignore[import-outside-top-level]
+
+            table = _arrow_table(records)
+            sink = pa.BufferOutputStream()
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            return sink.getvalue().to_pybytes()
+
+
+def iter_dump(records: Iterable[Record], fmt: OutputFormat) -> Iterator[bytes]:
+    """Serialize records in format fmt one record at a time.
+
+    The chunks joined are the same bytes as dump returns. The columnar
+    formats are written in one go.
+    """
+    match fmt:
+        case OutputFormat.YAML:
+            start = b"---\n"
+            for record in records:
+                yield start + yaml.dump(
+                    [record], Dumper=YamlDumper, indent=2, default_flow_style=False
+                ).encode("utf-8")
+                start = b""
+            if start:
+                yield dump([], fmt)
+        case OutputFormat.JSON:
+            separator = b"[\n"
+            for record in records:
+                text = json.dumps(
+                    record, indent=2, sort_keys=True, default=_json_default
+                )
+                yield separator + textwrap.indent(text, "  ").encode("utf-8")
+                separator = b",\n"
+            yield b"[]\n" if separator == b"[\n" else b"\n]\n"
+        case OutputFormat.JSONL:
+            for record in records:
+                yield dump([record], fmt)
+        case _:
+            yield dump(list(records), fmt)
+
+
+def _yaml_scalar(loader: YamlLoader) -> Any:  # ruff: ignore[any-type]
+    event = loader.get_event()
+    if not isinstance(event, yaml.ScalarEvent):
+        raise TypeError(f"Expected a scalar, got {event}")
+    tag = event.tag
+    if tag in {None, "!"}:
+        tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+    node = yaml.ScalarNode(tag, event.value, style=event.style)
+    # construct_object would keep every node, call the constructor directly
+    if (constructor := loader.yaml_constructors.get(tag)) is None:
+        raise ValueError(f"Unsupported tag {tag}")
+    return constructor(loader, node)
+
+
+def _iter_load_yaml(stream: BinaryIO) -> Iterator[Record]:
+    loader = YamlLoader(stream)
+    try:
+        loader.get_event()
+        if loader.check_event(yaml.StreamEndEvent):
+            return
+        loader.get_event()
+        if not loader.check_event(yaml.SequenceStartEvent):
+            raise ValueError("Expected a sequence of records")
+        loader.get_event()
+        while not loader.check_event(yaml.SequenceEndEvent):
+            if not loader.check_event(yaml.MappingStartEvent):
+                raise ValueError("Expected a record")
+            loader.get_event()
+            record = {}
+            while not loader.check_event(yaml.MappingEndEvent):
+                key = _yaml_scalar(loader)
+                record[key] = _yaml_scalar(loader)
+            loader.get_event()
+            yield record
+    finally:
+        loader.dispose()
+
+
+def iter_load(stream: BinaryIO, fmt: OutputFormat) -> Iterator[Record]:
+    """Deserialize the records written by dump one at a time.
+
+    YAML must hold flat records like dump writes them, else ValueError or
+    TypeError is raised.
+    """
+    match fmt:
+        case OutputFormat.YAML:
+            yield from _iter_load_yaml(stream)
+        case OutputFormat.JSONL:
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        case _:
+            yield from load(stream.read(), fmt)
+
+
+def load(data: bytes, fmt: OutputFormat) -> list[Record]:
+    """Deserialize records written by dump."""
+    if not fmt.available:
+        raise RuntimeError(f"Output format {fmt} requires pyarrow")
+    match fmt:
+        case OutputFormat.YAML:
+            # libyaml scans a str faster than bytes
+            return yaml.load(data.decode("utf-8"), Loader=YamlLoader)
+        case OutputFormat.JSON:
+            return json.loads(data)
+        case OutputFormat.JSONL:
+            return [json.loads(line) for line in data.splitlines() if line.strip()]
+        case OutputFormat.PARQUET:
+            import pyarrow as pa  # ruff: ignore[import-outside-top-level]
+            import pyarrow.parquet as pq  # ruff: ignore[import-outside-top-level]
+
+            return pq.read_table(pa.BufferReader(data)).to_pylist()
+        case OutputFormat.ARROW:
+            import pyarrow as pa  # ruff: ignore[import-outside-top-level]
+
+            return pa.ipc.open_file(pa.BufferReader(data)).read_all().to_pylist()
@@ -0,0 +1,78 @@
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING
+
+from aws_generated_data.atomic import atomic_write
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+
+
+class PageArchive:
+    """Compressed, content-addressed archive of fetched pages.
+
+    Pages are stored gzipped as pages/<sha256 of the body>.html.gz, so
+    recording a page again only adds a file if it changed. manifest.json maps
+    each URL to the hash of its latest recording. In replay mode, pages are
+    served from the archive only; there is no network access.
+    """
+
+    def __init__(self, directory: Path, *, replay: bool = False) -> None:
+        self.directory = directory
+        self.replay = replay
+        self.pages = 0
+        self._lock = threading.Lock()
+        try:
+            self.manifest: dict[str, dict[str, str]] = json.loads(
+                (directory / MANIFEST).read_text(encoding="utf-8")
+            )
+        except FileNotFoundError:
+            if replay:
+                raise ValueError(f"No page archive in {directory}") from None
+            self.manifest = {}
+
+    def _path(self, digest: str) -> Path:
+        return self.directory / "pages" / f"{digest}.html.gz"
+
+    def load(self, url: str) -> str:
+        try:
+            digest = self.manifest[url]["sha256"]
+        except KeyError:
+            raise RuntimeError(f"{url} is not in the page archive") from None
+        body = gzip.decompress(self._path(digest).read_bytes())
+        if hashlib.sha256(body).hexdigest() != digest:
+            raise RuntimeError(f"Corrupt page archive entry for {url}")
+        with self._lock:
+            self.pages += 1
+        log.debug(f"Replayed {url} from the page archive")
+        return body.decode("utf-8")
+
+    def store(self, url: str, body: str) -> None:
+        data = body.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # mtime=0 keeps the archive byte-identical for identical pages
+            atomic_write(path, gzip.compress(data, mtime=0))
+        with self._lock:
+            self.manifest[url] = {
+                "sha256": digest,
+                "recorded_at": datetime.now(tz=UTC).isoformat(timespec="seconds"),
+            }
+            manifest = json.dumps(self.manifest, indent=2, sort_keys=True)
+            atomic_write(self.directory / MANIFEST, f"{manifest}\n".encode())
+            self.pages += 1
+        log.debug(f"Recorded {url} in the page archive")
+
+    def log_stats(self) -> None:
+        action = "replayed from" if self.replay else "recorded in"
+        log.info(f"Page archive: {self.pages} pages {action} {self.directory}")
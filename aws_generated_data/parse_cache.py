@@ -0,0 +1,140 @@
+import contextlib
+import functools
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from aws_generated_data.atomic import atomic_write
+from aws_generated_data.parsing import get_parser
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+log = logging.getLogger(__name__)
+
+CalItem = tuple[str, datetime]
+CacheKey = tuple[str | int | None, ...]
+
+PACKAGE_DIR = Path(__file__).parent
+# any change in these modules may change the parse results
+PARSER_MODULES = (
+    "parsing.py",
+    "utils.py",
+    "engines.py",
+    "commands/rds_eol.py",
+    "commands/msk_eol.py",
+)
+MAX_ENTRIES = 256
+
+
+@functools.cache
+def parser_version() -> str:
+    """Hash of the parser source code."""
+    digest = hashlib.sha256()
+    for module in PARSER_MODULES:
+        digest.update((PACKAGE_DIR / module).read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class ParseCache:
+    """On-disk cache of parse results keyed by the page content.
+
+    Entries of other parser versions are removed on startup and the least
+    recently used entries are evicted once max_entries is exceeded.
+    """
+
+    def __init__(self, directory: Path, max_entries: int = MAX_ENTRIES) -> None:
+        self.directory = directory / parser_version()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if directory.is_dir():
+            for stale in directory.iterdir():
+                if stale != self.directory:
+                    shutil.rmtree(stale, ignore_errors=True)
+
+    def _path(self, page: str, key: CacheKey) -> Path:
+        digest = hashlib.sha256(page.encode("utf-8"))
+        digest.update(json.dumps([*key, str(get_parser())]).encode("utf-8"))
+        return self.directory / f"{digest.hexdigest()}.json"
+
+    def get(self, page: str, key: CacheKey) -> list[CalItem] | None:
+        path = self._path(page, key)
+        try:
+            items = [
+                (version, datetime.fromisoformat(eol))
+                for version, eol in json.loads(path.read_text(encoding="utf-8"))
+            ]
+        except FileNotFoundError:
+            return None
+        except TypeError, ValueError:
+            log.warning(f"Ignoring corrupt parse cache entry {path}")
+            return None
+        # keep recently used entries from being evicted; touch() would
+        # recreate an entry evicted in the meantime as an empty file
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        return items
+
+    def store(self, page: str, key: CacheKey, items: list[CalItem]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        atomic_write(
+            self._path(page, key),
+            json.dumps([(version, eol.isoformat()) for version, eol in items]),
+        )
+        self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for path in self.directory.glob("*.json"):
+                try:
+                    entries.append((path.stat().st_mtime, path))
+                except FileNotFoundError:
+                    # removed by another process in the meantime
+                    continue
+            entries.sort()
+            for _, path in entries[: max(len(entries) - self.max_entries, 0)]:
+                path.unlink(missing_ok=True)
+
+    def parse(
+        self, page: str, key: CacheKey, parse: Callable[[], list[CalItem]]
+    ) -> list[CalItem]:
+        if (items := self.get(page, key)) is not None:
+            with self._lock:
+                self.hits += 1
+            return items
+        with self._lock:
+            self.misses += 1
+        items = parse()
+        self.store(page, key, items)
+        return items
+
+    def log_stats(self) -> None:
+        log.info(f"Parse cache: {self.hits} hits, {self.misses} misses")
+
+
+_parse_cache: ParseCache | None = None
+
+
+def configure_parse_cache(directory: Path | None) -> ParseCache | None:
+    """Enable (or disable with None) the parse result cache."""
+    global _parse_cache  # ruff: ignore[global-statement]
+    _parse_cache = ParseCache(directory) if directory else None
+    return _parse_cache
+
+
+def cached_parse(
+    page: str, key: CacheKey, parse: Callable[[], list[CalItem]]
+) -> list[CalItem]:
+    """Return the cached result of parse for page and key, or run parse."""
+    if not _parse_cache:
+        return parse()
+    return _parse_cache.parse(page, key, parse)
@@ -0,0 +1,327 @@
+import importlib.util
+import logging
+import re
+from enum import StrEnum
+from typing import TYPE_CHECKING, TypeVar
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from concurrent.futures import ProcessPoolExecutor
+
+log = logging.getLogger(__name__)
+
+TABLE_TAG = re.compile(r"<(/?)table\b", re.IGNORECASE)
+ROW_TAG = re.compile(r"<tr\b", re.IGNORECASE)
+CELL_TAG = re.compile(r"<td\b", re.IGNORECASE)
+
+ItemType = TypeVar("ItemType")
+# the stripped texts of the <td> cells of a table row
+Row = list[str]
+Table = list[Row]
+
+
+class ParserBackend(StrEnum):
+    HTML5LIB = "html5lib"
+    LXML = "lxml"
+    HTML_PARSER = "html.parser"
+    SELECTOLAX = "selectolax"
+
+    @property
+    def available(self) -> bool:
+        return (
+            importlib.util.find_spec(self.value.split(".", maxsplit=1)[0]) is not None
+        )
+
+
+_backend = ParserBackend.HTML5LIB
+_parse_pool: ProcessPoolExecutor | None = None
+
+
+def configure_parser(backend: ParserBackend) -> None:
+    """Set the parser backend used by parse_tables."""
+    global _backend  # ruff: ignore[global-statement]
+    if not backend.available:
+        raise ValueError(f"HTML parser {backend} is not installed")
+    _backend = backend
+
+
+def get_parser() -> ParserBackend:
+    return _backend
+
+
+def configure_parse_pool(processes: int) -> ProcessPoolExecutor | None:
+    """Run parse_tables in a pool of processes (or in the caller with 0).
+
+    The pages are still downloaded by the threads of the commands; while a
+    thread waits for its page to be parsed in another process, the others keep
+    downloading.
+    """
+    global _parse_pool  # ruff: ignore[global-statement]
+    if _parse_pool:
+        _parse_pool.shutdown(cancel_futures=True)
+    _parse_pool = None
+    if processes:
+        # the pool is only worth starting for a real run
+        from concurrent.futures import (  # ruff: ignore[import-outside-top-level]
+            ProcessPoolExecutor,
+        )
+
+        # the workers don't inherit the configuration of this process
+        _parse_pool = ProcessPoolExecutor(
+            processes, initializer=configure_parser, initargs=(_backend,)
+        )
+    return _parse_pool
+
+
+def section_pattern(section_id: str) -> re.Pattern[str]:
+    """Match the id attribute of the section element."""
+    return re.compile(
+        rf"""(?<![\w-])id\s*=\s*(["']?){re.escape(section_id)}\1(?=[\s/>])""",
+        re.IGNORECASE,
+    )
+
+
+def table_fragment(
+    page: str, table_limit: int, section_id: str | None = None
+) -> str | None:
+    """Cut the first table_limit tables after section_id out of the raw page.
+
+    Tables nested in one of these tables are counted like BeautifulSoup's
+    find_all_next() does and the fragment always ends with a complete top-level
+    table. Returns None if the section or the tables can't be found.
+    """
+    start = 0
+    if section_id:
+        if not (match := section_pattern(section_id).search(page)):
+            return None
+        start = match.end()
+
+    fragment_start = None
+    depth = opened = 0
+    for tag in TABLE_TAG.finditer(page, start):
+        if not tag.group(1):
+            if fragment_start is None:
+                fragment_start = tag.start()
+            opened += 1
+            depth += 1
+        elif depth:
+            depth -= 1
+            if not depth and opened >= table_limit:
+                end = page.find(">", tag.end())
+                return page[fragment_start : end + 1] if end != -1 else None
+    return None
+
+
+# longest id attribute section_pattern() is expected to match
+SECTION_MARGIN = 256
+
+
+class TableScanner:
+    """Incremental table_fragment() over a page received in chunks.
+
+    feed() returns True once the first table_limit tables after section_id
+    are complete; page is then the received text up to the end of the last
+    table, and table_fragment() finds the same fragment in it as in the whole
+    page.
+    """
+
+    def __init__(self, table_limit: int, section_id: str | None = None) -> None:
+        self.table_limit = table_limit
+        self.end: int | None = None
+        self._chunks: list[str] = []
+        # the received text from _offset on, the part that is still scanned
+        self._tail = ""
+        self._offset = 0
+        self._section = section_pattern(section_id) if section_id else None
+        self._pos = 0
+        self._depth = self._opened = 0
+        # position of the closing tag of the last table, waiting for its ">"
+        self._closing: int | None = None
+
+    @property
+    def page(self) -> str:
+        return "".join(self._chunks)[: self.end]
+
+    def feed(self, chunk: str) -> bool:
+        self._chunks.append(chunk)
+        if self.end is None:
+            # drop the scanned text, so each chunk is only scanned once
+            # (plus the overlap kept by _scan for a tag cut off by a chunk end)
+            scanned = self._pos
+            self._tail = self._tail[scanned:] + chunk
+            self._offset += scanned
+            self._pos = 0
+            if self._closing is not None:
+                self._closing -= scanned
+            if (end := self._scan()) is not None:
+                self.end = self._offset + end
+        return self.end is not None
+
+    def _scan(self) -> int | None:
+        text = self._tail
+        if self._section:
+            if not (match := self._section.search(text, self._pos)):
+                self._pos = max(len(text) - SECTION_MARGIN, 0)
+                return None
+            self._section = None
+            self._pos = match.end()
+        if self._closing is None:
+            self._scan_tables(text)
+        if self._closing is None:
+            return None
+        if (end := text.find(">", self._closing)) == -1:
+            self._closing = self._pos = len(text)
+            return None
+        return end + 1
+
+    def _scan_tables(self, text: str) -> None:
+        for tag in TABLE_TAG.finditer(text, self._pos):
+            # "<table" at the very end may be the start of another tag name
+            if tag.end() == len(text):
+                break
+            self._pos = tag.end()
+            if not tag.group(1):
+                self._opened += 1
+                self._depth += 1
+            elif self._depth:
+                self._depth -= 1
+                if not self._depth and self._opened >= self.table_limit:
+                    self._closing = tag.end()
+                    return
+        else:
+            # skip the scanned text, except a tag cut off by the chunk end
+            self._pos = max(self._pos, len(text) - len("</table"))
+
+
+def _soup_tables(
+    page: str, table_limit: int, section_id: str | None, backend: ParserBackend
+) -> list[Table]:
+    # bs4 and html5lib take a while to import, don't slow down the CLI startup
+    from bs4 import BeautifulSoup, Tag  # ruff: ignore[import-outside-top-level]
+
+    soup = BeautifulSoup(page, backend.value)
+    tables: list[Tag]
+    if not section_id:
+        tables = soup.find_all("table", limit=table_limit)
+    elif not (section := soup.find(id=section_id)):
+        raise RuntimeError(f"Failed to find section {section_id}")
+    else:
+        tables = [
+            table
+            for table in section.find_all_next("table", limit=table_limit)
+            if isinstance(table, Tag)
+        ]
+    return [
+        [[td.text.strip() for td in tr.find_all("td")] for tr in table.find_all("tr")]
+        for table in tables
+    ]
+
+
+def _selectolax_tables(fragment: str, table_limit: int) -> list[Table]:
+    from selectolax.lexbor import (  # ruff: ignore[import-outside-top-level]
+        LexborHTMLParser,
+    )
+
+    return [
+        [[td.text().strip() for td in tr.css("td")] for tr in table.css("tr")]
+        for table in LexborHTMLParser(fragment).css("table")[:table_limit]
+    ]
+
+
+def find_tables(
+    page: str,
+    table_limit: int,
+    section_id: str | None = None,
+    *,
+    backend: ParserBackend | None = None,
+    scoped: bool = True,
+) -> list[Table]:
+    """Return the rows of the first table_limit tables after section_id.
+
+    Without section_id, the first tables of the page are returned. In scoped mode
+    only the relevant part of the page is parsed; the whole document is parsed
+    if that part can't be located. RuntimeError is raised if a backend other
+    than html5lib returns fewer or more rows or cells than the part has tags.
+    """
+    backend = backend or _backend
+    fragment = table_fragment(page, table_limit, section_id) if scoped else None
+    if backend is ParserBackend.SELECTOLAX:
+        # selectolax can't search "everything after an element", it needs the
+        # fragment
+        if not fragment:
+            raise RuntimeError("Failed to locate the tables for selectolax")
+        tables = _selectolax_tables(fragment, table_limit)
+    elif fragment:
+        tables = _soup_tables(fragment, table_limit, None, backend)
+    else:
+        return _soup_tables(page, table_limit, section_id, backend)
+    if backend is not ParserBackend.HTML5LIB and not _matches_markup(tables, fragment):
+        raise RuntimeError(f"The {backend} parser disagrees with the table markup")
+    return tables
+
+
+def _matches_markup(tables: list[Table], fragment: str) -> bool:
+    """Whether tables has as many rows and cells as there are tags in fragment.
+
+    A cheap check that a lenient parser didn't nest or drop rows, e.g. for a
+    <tr> without </tr>.
+    """
+    rows = [row for table in tables for row in table]
+    cells = sum(len(row) for row in rows)
+    return (len(rows), cells) == (
+        len(ROW_TAG.findall(fragment)),
+        len(CELL_TAG.findall(fragment)),
+    )
+
+
+def _extract_items[ItemType](
+    page: str,
+    table_limit: int,
+    extract: Callable[[list[Table]], list[ItemType]],
+    section_id: str | None,
+    backend: ParserBackend,
+) -> list[ItemType]:
+    if not (tables := find_tables(page, table_limit, section_id, backend=backend)):
+        raise RuntimeError("Failed to find version table")
+    return extract(tables)
+
+
+def parse_tables[ItemType](
+    page: str,
+    table_limit: int,
+    extract: Callable[[list[Table]], list[ItemType]],
+    section_id: str | None = None,
+    *,
+    backend: ParserBackend | None = None,
+) -> list[ItemType]:
+    """Extract items from the tables with the configured parser backend.
+
+    html5lib is the reference parser: if another backend fails to find the
+    tables, its rows don't match the table markup (see find_tables), or extract
+    fails on its output, the page is parsed again with html5lib.
+    With a parse pool, extract must be a module level function.
+    """
+    backend = backend or _backend
+    if _parse_pool:
+        return _parse_pool.submit(
+            _parse_tables, page, table_limit, extract, section_id, backend
+        ).result()
+    return _parse_tables(page, table_limit, extract, section_id, backend)
+
+
+def _parse_tables[ItemType](
+    page: str,
+    table_limit: int,
+    extract: Callable[[list[Table]], list[ItemType]],
+    section_id: str | None,
+    backend: ParserBackend,
+) -> list[ItemType]:
+    if backend is ParserBackend.HTML5LIB:
+        return _extract_items(page, table_limit, extract, section_id, backend)
+    try:
+        return _extract_items(page, table_limit, extract, section_id, backend)
+    except RuntimeError as e:
+        log.warning(f"{e}, falling back to html5lib")
+    return _extract_items(
+        page, table_limit, extract, section_id, ParserBackend.HTML5LIB
+    )
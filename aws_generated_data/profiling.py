@@ -0,0 +1,117 @@
+import contextlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import cProfile
+    from collections.abc import Generator
+    from pathlib import Path
+
+log = logging.getLogger(__name__)
+
+# the summary lists the phases in pipeline order; "merge" is the single pass
+# reading, merging, cleaning up and writing the output files
+PHASES = ("fetch", "parse", "validate", "merge")
+
+
+@dataclass
+class PhaseStats:
+    calls: int = 0
+    wall: float = 0.0
+    cpu: float = 0.0
+
+
+class Profiler:
+    """Wall and CPU time per pipeline phase and engine.
+
+    CPU time is measured per thread, so phases running concurrently in the
+    worker threads are accounted correctly. With pstats_file, the whole run
+    is profiled with cProfile as well.
+    """
+
+    def __init__(self, pstats_file: Path | None = None) -> None:
+        self.phases: dict[tuple[str, str], PhaseStats] = {}
+        self.pstats_file = pstats_file
+        self._lock = threading.Lock()
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._cprofile: cProfile.Profile | None = None
+        if pstats_file:
+            import cProfile  # ruff: ignore[import-outside-top-level]
+
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    @contextlib.contextmanager
+    def phase(self, name: str, label: str) -> Generator[None]:
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            with self._lock:
+                stats = self.phases.setdefault((label, name), PhaseStats())
+                stats.calls += 1
+                stats.wall += wall
+                stats.cpu += cpu
+
+    def summary(self) -> str:
+        lines = [f"{'':20} {'phase':10} {'calls':>6} {'wall ms':>10} {'cpu ms':>10}"]
+        for (label, name), stats in sorted(
+            self.phases.items(),
+            key=lambda item: (item[0][0], PHASES.index(item[0][1])),
+        ):
+            lines.append(
+                f"{label:20} {name:10} {stats.calls:6} "
+                f"{stats.wall * 1000:10.1f} {stats.cpu * 1000:10.1f}"
+            )
+        lines.append(
+            f"{'total':20} {'':10} {'':6} "
+            f"{(time.perf_counter() - self._wall) * 1000:10.1f} "
+            f"{(time.process_time() - self._cpu) * 1000:10.1f}"
+        )
+        return "\n".join(lines)
+
+    def save(self) -> None:
+        """Log the summary and save the cProfile statistics collected so far."""
+        if self._cprofile and self.pstats_file:
+            self._cprofile.dump_stats(self.pstats_file)
+            # dump_stats stops the profiler
+            self._cprofile.enable()
+            log.info(f"Saved the cProfile statistics to {self.pstats_file}")
+        log.info(f"Profile:\n{self.summary()}")
+
+    def close(self) -> None:
+        """Save the results at the end of the run, see save."""
+        self.save()
+        if self._cprofile:
+            self._cprofile.disable()
+        self._cprofile = None
+
+
+_profiler: Profiler | None = None
+
+
+def configure_profiler(
+    *, enabled: bool, pstats_file: Path | None = None
+) -> Profiler | None:
+    """Enable (or disable) the phase timings recorded by phase()."""
+    global _profiler  # ruff: ignore[global-statement]
+    _profiler = Profiler(pstats_file) if enabled or pstats_file else None
+    return _profiler
+
+
+def save_profile() -> None:
+    """Save the profile now and keep profiling, e.g. after each refresh."""
+    if _profiler:
+        _profiler.save()
+
+
+def phase(name: str, label: str) -> contextlib.AbstractContextManager[None]:
+    """Time the block as phase name of label, e.g. phase("parse", "postgres")."""
+    if not _profiler:
+        return contextlib.nullcontext()
+    return _profiler.phase(name, label)
@@ -1,105 +1,698 @@
-# ruff: file-ignore[call-datetime-strptime-without-zone]
+# ruff: file-ignore[call-datetime-without-tzinfo]
 import calendar
+import codecs
+import contextlib
+import functools
+import hashlib
+import heapq
+import itertools
 import logging
+import math
 import re
-from collections.abc import Iterable, Sequence
+import threading
+import time
+from dataclasses import dataclass, field
 from datetime import date, datetime
-from typing import TYPE_CHECKING, Any, Protocol, TypeVar
+from operator import attrgetter
+from typing import TYPE_CHECKING, Annotated, Any, Protocol, TypeVar
+from urllib.parse import urlsplit
 
 import requests
 import yaml
-from pydantic import BaseModel, RootModel, ValidationError, field_validator
+from pydantic import BeforeValidator, TypeAdapter
+from requests.adapters import HTTPAdapter, Retry
+
+from aws_generated_data.atomic import atomic_file, atomic_write
+from aws_generated_data.defaults import (
+    HTTP_BACKOFF_FACTOR,
+    HTTP_RETRIES,
+    HTTP_TIMEOUT,
+    MAX_CONNECTIONS_PER_HOST,
+)
+from aws_generated_data.http_cache import CacheEntry, HttpCache
+from aws_generated_data.metrics import set_metric
+from aws_generated_data.output_formats import (
+    OutputFormat,
+    dump,
+    iter_dump,
+    iter_load,
+    load,
+)
+from aws_generated_data.page_archive import PageArchive
 
 if TYPE_CHECKING:
+    from collections.abc import (
+        Callable,
+        Collection,
+        Iterable,
+        Iterator,
+        Sequence,
+    )
     from pathlib import Path
 
-MONTH_YEAR = re.compile(r"\w+ \d+")
-DAY_MONTH_YEAR = re.compile(r"\d+ \w+ \d+")
-MONTH_DAY_YEAR = re.compile(r"\w+ \d+, \d+")
-ISO = re.compile(r"\d{4}-\d{2}-\d{2}")
+    from aws_generated_data.parsing import TableScanner
+
+MONTHS = {
+    name.lower(): number
+    for number, name in enumerate(
+        (
+            "January",
+            "February",
+            "March",
+            "April",
+            "May",
+            "June",
+            "July",
+            "August",
+            "September",
+            "October",
+            "November",
+            "December",
+        ),
+        start=1,
+    )
+}
 
 log = logging.getLogger(__name__)
 
-EOLType = TypeVar("EOLType", bound="HasEOL")
+KeyedType = TypeVar("KeyedType", bound="Keyed")
 ItemType = TypeVar("ItemType")
-Root = RootModel[Sequence[Any]]
+SortableType = TypeVar("SortableType", bound="VersionItem")
+# numeric version parts and the suffix, e.g. ((2, 8, 2), "tiered")
+VersionKey = tuple[tuple[float, ...], str]
 
 VERSION_PATTERN = re.compile(r"(?<!\d)(\d+(\.\d+){0,3})(?!\d)")
+# size of the response chunks scanned while streaming a page
+STREAM_CHUNK_SIZE = 64 * 1024
+SHARD_MANIFEST = "manifest.json"
+SHARD_NAME_PATTERN = re.compile(r"[\w.-]+")
+
+_host_slots: dict[str, threading.BoundedSemaphore] = {}
+_host_slots_lock = threading.Lock()
+_http_cache: HttpCache | None = None
+_page_archive: PageArchive | None = None
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_http_timeout = HTTP_TIMEOUT
+_stream_pages = False
+_items_adapters: dict[type[Any], TypeAdapter[Any]] = {}
 
 
 class HasEOL(Protocol):
-    eol: date
+    @property
+    def eol(self) -> date: ...
+
+
+class Keyed(HasEOL, Protocol):
+    @property
+    def key(self) -> tuple[str, ...]: ...
+
+
+def normalize_version(value: str) -> str:
+    """Extract the version number, e.g. "Version 1.2 (LTS)*" -> "1.2"."""
+    # special msk version handling
+    if value.endswith(("-tiered", ".x")):
+        return value
+
+    if not (match := VERSION_PATTERN.search(value)):
+        raise ValueError(f"Invalid version: {value}")
+    return match.group()
+
 
+Version = Annotated[str, BeforeValidator(normalize_version)]
 
-class VersionItem(BaseModel):
-    version: str
+
+@dataclass(frozen=True, slots=True)
+class VersionItem:
+    """EOL date of a version.
+
+    Plain records without validation, use validate_items to create them from
+    scraped or loaded data.
+    """
+
+    version: Version
     eol: date
+    # natural sort key, computed once
+    sort_key: tuple[Any, ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "sort_key", self._compute_sort_key())
 
-    @field_validator("version", mode="before")
-    @classmethod
-    def version_remove_asterisk(cls, value: str) -> str:
-        # special msk version handling
-        if value.endswith(("-tiered", ".x")):
-            return value
+    def _compute_sort_key(self) -> tuple[Any, ...]:
+        return version_key(self.version)
 
-        if not (match := VERSION_PATTERN.search(value)):
-            raise ValueError(f"Invalid version: {value}")
-        return match.group()
+    @property
+    def key(self) -> tuple[str, ...]:
+        """Identity of the item in an output file."""
+        return (self.version,)
 
     def __lt__(self, other: Any) -> bool:  # ruff: ignore[any-type]
         if not isinstance(other, VersionItem):
             return False
-        return self.version < other.version
+        return self.sort_key < other.sort_key
+
+
+def items_adapter[ItemType](item_type: type[ItemType]) -> TypeAdapter[list[ItemType]]:
+    """Validator and serializer of a list of items, built once per item type."""
+    if (adapter := _items_adapters.get(item_type)) is None:
+        adapter = _items_adapters[item_type] = TypeAdapter(list[item_type])  # type: ignore[valid-type]
+    return adapter
+
+
+def validate_items[ItemType](
+    item_type: type[ItemType], records: Sequence[dict[str, Any]]
+) -> list[ItemType]:
+    """Create items from records, validating all of them in one go."""
+    return items_adapter(item_type).validate_python(records)
+
+
+def version_key(version: str) -> VersionKey:
+    """Sort key comparing versions numerically, e.g. 17.10 > 17.9.
+
+    Wildcards like the "x" in MSK's "3.7.x" sort after all numbers and
+    a suffix like "-tiered" sorts after the plain version.
+    """
+    numbers, _, suffix = version.partition("-")
+    return (
+        tuple(
+            int(part) if part.isdecimal() else math.inf for part in numbers.split(".")
+        ),
+        suffix,
+    )
+
+
+def sort_items[SortableType: "VersionItem"](
+    items: Iterable[SortableType],
+) -> list[SortableType]:
+    """Sort items newest version first."""
+    return sorted(items, key=attrgetter("sort_key"), reverse=True)
+
+
+def _month(name: str) -> int:
+    try:
+        return MONTHS[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown month: {name}") from None
+
 
+def _number(value: str, min_digits: int, max_digits: int) -> int:
+    if not (value.isdecimal() and min_digits <= len(value) <= max_digits):
+        raise ValueError(f"Invalid number: {value}")
+    return int(value)
 
+
+@functools.lru_cache(maxsize=1024)
 def parse_date(date_str: str) -> datetime:
-    if MONTH_YEAR.fullmatch(date_str):
-        d = datetime.strptime(date_str, "%B %Y")
-        # a date like "March 2022" means actually "March 31, 2022"
-        last_day_of_month = calendar.monthrange(d.year, d.month)[1]
-        return d.replace(day=last_day_of_month)
-    if DAY_MONTH_YEAR.fullmatch(date_str):
-        return datetime.strptime(date_str, "%d %B %Y")
-    if MONTH_DAY_YEAR.fullmatch(date_str):
-        return datetime.strptime(date_str, "%B %d, %Y")
-    if ISO.fullmatch(date_str):
-        return datetime.strptime(date_str, "%Y-%m-%d")
+    # the release calendars repeat the same few dates in every row, hence the cache
+    match date_str.split(" "):
+        case [month_str, year_str]:
+            year, month = _number(year_str, 4, 4), _month(month_str)
+            # a date like "March 2022" means actually "March 31, 2022"
+            return datetime(year, month, calendar.monthrange(year, month)[1])
+        case [day_str, month_str, year_str] if day_str.isdecimal():
+            return datetime(
+                _number(year_str, 4, 4), _month(month_str), _number(day_str, 1, 2)
+            )
+        case [month_str, day_str, year_str] if day_str.endswith(","):
+            return datetime(
+                _number(year_str, 4, 4), _month(month_str), _number(day_str[:-1], 1, 2)
+            )
+        case [iso]:
+            match iso.split("-"):
+                case [year_str, month_str, day_str]:
+                    return datetime(
+                        _number(year_str, 4, 4),
+                        _number(month_str, 2, 2),
+                        _number(day_str, 2, 2),
+                    )
     raise ValueError(f"Unknown date format: {date_str}")
 
 
 def read_output_file[ItemType](
-    output: Path, item_type: type[ItemType]
+    output: Path,
+    item_type: type[ItemType],
+    *,
+    shards: Collection[str] | None = None,
+    strict: bool = False,
 ) -> list[ItemType]:
+    """Load the items of output (only the named shards of a sharded output).
+
+    An invalid file has no items, or raises ValueError with strict.
+    """
+    fmt = OutputFormat.from_path(output)
+    if strict and not output.exists() and not read_shard_manifest(output):
+        return []
     try:
-        return [
-            item_type(**item)
-            for item in yaml.safe_load(output.read_text(encoding="utf-8"))
-        ]
-    except TypeError, FileNotFoundError, ValidationError:
+        if manifest := read_shard_manifest(output):
+            directory = shard_dir(output)
+            records = [
+                record
+                for file, shard in manifest.items()
+                if shards is None or shard.name in shards
+                for record in load((directory / file).read_bytes(), fmt)
+            ]
+        else:
+            records = load(output.read_bytes(), fmt)
+        return validate_items(item_type, records)
+    except (TypeError, ValueError, FileNotFoundError, yaml.YAMLError) as e:
+        # ValidationError and the JSON and Arrow decoding errors are ValueErrors
+        if strict:
+            raise ValueError(f"Failed to load {output}") from e
         log.warning(f"Failed to load {output}")
         return []
 
 
-def write_output_file(output: Path, items: Sequence[Any]) -> None:
-    log.info(f"Saving to {output} ...")
-    output.write_text(
-        yaml.dump(
-            Root(items).model_dump(),
-            explicit_start=True,
-            indent=2,
-            default_flow_style=False,
+def iter_output_file[ItemType](
+    output: Path, item_type: type[ItemType]
+) -> Iterator[ItemType]:
+    """Load the items of output one at a time; invalid content raises ValueError."""
+    adapter = items_adapter(item_type)
+    try:
+        f = output.open("rb")
+    except FileNotFoundError:
+        return
+    with f:
+        for record in iter_load(f, OutputFormat.from_path(output)):
+            yield adapter.validate_python([record])[0]
+
+
+def dump_items(items: Sequence[Any], fmt: OutputFormat) -> bytes:
+    """Serialize items like they are saved in an output file of format fmt."""
+    records = items_adapter(type(items[0])).dump_python(list(items)) if items else []
+    return dump(records, fmt)
+
+
+def write_output_files(outputs: Sequence[Path], items: Iterable[Any]) -> None:
+    """Save items to outputs one at a time, unless a file is up to date."""
+    records = (items_adapter(type(item)).dump_python([item])[0] for item in items)
+    with contextlib.ExitStack() as stack:
+        files = [
+            stack.enter_context(atomic_file(path, unless_unchanged=True))
+            for path in outputs
+        ]
+        chunks = itertools.zip_longest(
+            *(
+                iter_dump(path_records, OutputFormat.from_path(path))
+                for path, path_records in zip(
+                    outputs, itertools.tee(records, len(outputs)), strict=True
+                )
+            )
+        )
+        for output_chunks in chunks:
+            for f, chunk in zip(files, output_chunks, strict=True):
+                if chunk:
+                    f.write(chunk)
+
+
+@dataclass(frozen=True, slots=True)
+class Shard:
+    """A file of a sharded output as listed in its manifest."""
+
+    name: str
+    sha256: str
+    items: int
+    # the earliest EOL date, to tell if a clean-up can touch the shard
+    min_eol: date
+
+
+_manifest_adapter = TypeAdapter(dict[str, Shard])
+
+
+def shard_dir(output: Path) -> Path:
+    """Directory of the sharded layout of output, e.g. rds_eol/ for rds_eol.yaml."""
+    return output.with_suffix("")
+
+
+def _read_manifest(directory: Path) -> dict[str, Shard]:
+    try:
+        data = (directory / SHARD_MANIFEST).read_bytes()
+    except FileNotFoundError, NotADirectoryError:
+        return {}
+    return _manifest_adapter.validate_json(data)
+
+
+def read_shard_manifest(output: Path) -> dict[str, Shard]:
+    """The shards of output by file name; empty unless output is sharded."""
+    if shard_dir(output) == output:
+        # without an extension, output can't have a sharded layout
+        return {}
+    return {
+        file: shard
+        for file, shard in _read_manifest(shard_dir(output)).items()
+        if file.endswith(output.suffix)
+    }
+
+
+def write_sharded_output(
+    output: Path,
+    items: Sequence[Any],
+    shard_key: Callable[[Any], str],
+    *,
+    loaded: Collection[str] | None = None,
+) -> list[str]:
+    """Save items as one file per shard_key in shard_dir(output), with a manifest.
+
+    Returns the names of the shard files written or removed.
+    """
+    fmt = OutputFormat.from_path(output)
+    directory = shard_dir(output)
+    if directory == output:
+        raise ValueError(f"A sharded output needs an extension: {output}")
+    manifest = _read_manifest(directory)
+    groups: dict[str, list[Any]] = {}
+    for item in items:
+        groups.setdefault(shard_key(item), []).append(item)
+
+    changed = []
+    for name, shard_items in groups.items():
+        file = f"{name}{output.suffix}"
+        if not SHARD_NAME_PATTERN.fullmatch(name) or file == SHARD_MANIFEST:
+            raise ValueError(f"Invalid shard name: {name}")
+        content = dump_items(shard_items, fmt)
+        digest = hashlib.sha256(content).hexdigest()
+        shard = manifest.get(file)
+        if shard and shard.sha256 == digest and (directory / file).exists():
+            continue
+        directory.mkdir(parents=True, exist_ok=True)
+        atomic_write(directory / file, content)
+        manifest[file] = Shard(
+            name, digest, len(shard_items), min(item.eol for item in shard_items)
+        )
+        changed.append(file)
+    for file, shard in list(manifest.items()):
+        if (
+            file.endswith(output.suffix)
+            and shard.name not in groups
+            and (loaded is None or shard.name in loaded)
+        ):
+            (directory / file).unlink(missing_ok=True)
+            del manifest[file]
+            changed.append(file)
+
+    if changed:
+        log.info(f"Saving {len(changed)} shards to {directory} ...")
+        atomic_write(
+            directory / SHARD_MANIFEST,
+            _manifest_adapter.dump_json(dict(sorted(manifest.items())), indent=2)
+            + b"\n",
+        )
+    else:
+        log.info(f"{directory} is up to date")
+    return changed
+
+
+@dataclass
+class ItemChanges[KeyedType: "Keyed"]:
+    added: list[KeyedType] = field(default_factory=list)
+    removed: list[KeyedType] = field(default_factory=list)
+    # (old, new) pairs with a different EOL date
+    changed: list[tuple[KeyedType, KeyedType]] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.changed)
+
+    def log(self, output: Path) -> None:
+        if not self:
+            log.info(f"{output}: no changes")
+            return
+        log.info(
+            f"{output}: {len(self.added)} added, {len(self.removed)} removed, "
+            f"{len(self.changed)} EOL changes"
+        )
+        for item in self.added:
+            log.info(f"+ {' '.join(item.key)}: {item.eol}")
+        for item in self.removed:
+            log.info(f"- {' '.join(item.key)}: {item.eol}")
+        for old, new in self.changed:
+            log.info(f"~ {' '.join(new.key)}: {old.eol} -> {new.eol}")
+
+
+class UnsortedItemsError(ValueError):
+    """The items of an output file are not sorted newest version first."""
+
+
+class ItemMerge[SortableType: "VersionItem"]:
+    """Merge new items into the sorted items of an output file one at a time.
+
+    Only the new items are held in memory; expired items are dropped.
+    """
+
+    def __init__(self, new_items: Iterable[SortableType], expired_date: date) -> None:
+        self.expired_date = expired_date
+        self.new_items = {item.key: item for item in new_items}
+        self.changes: ItemChanges[SortableType] = ItemChanges()
+        # items by unique key, before and after the clean-up
+        self.merged = 0
+        self.expired = 0
+
+    def __call__(self, previous: Iterable[SortableType]) -> Iterator[SortableType]:
+        self.changes = ItemChanges()
+        self.merged = self.expired = 0
+        seen: set[tuple[str, ...]] = set()
+        new_items = sort_items(
+            item for item in self.new_items.values() if self._keep(item)
+        )
+        yield from heapq.merge(
+            self._previous(previous, seen),
+            new_items,
+            key=attrgetter("sort_key"),
+            reverse=True,
+        )
+        self.merged += len(self.new_items)
+        self.changes.added = [item for item in new_items if item.key not in seen]
+
+    def _keep(self, item: SortableType) -> bool:
+        if item.eol > self.expired_date:
+            return True
+        self.expired += 1
+        return False
+
+    def _previous(
+        self, previous: Iterable[SortableType], seen: set[tuple[str, ...]]
+    ) -> Iterator[SortableType]:
+        for item in _unique_items(previous):
+            if (new_item := self.new_items.get(item.key)) is None:
+                self.merged += 1
+                if self._keep(item):
+                    yield item
+                else:
+                    self.changes.removed.append(item)
+            else:
+                seen.add(item.key)
+                if new_item.eol <= self.expired_date:
+                    self.changes.removed.append(item)
+                elif new_item.eol != item.eol:
+                    self.changes.changed.append((item, new_item))
+
+
+def _unique_items[SortableType: "VersionItem"](
+    items: Iterable[SortableType],
+) -> Iterator[SortableType]:
+    """Sorted items without duplicate keys; the last one wins, like in a dict."""
+    run: dict[tuple[str, ...], SortableType] = {}
+    last = None
+    for item in items:
+        if last is not None and item.sort_key != last.sort_key:
+            if item.sort_key > last.sort_key:
+                raise UnsortedItemsError(f"{item} is sorted after {last}")
+            yield from run.values()
+            run = {}
+        run[item.key] = item
+        last = item
+    yield from run.values()
+
+
+def merge_output_files[SortableType: "VersionItem"](
+    outputs: Sequence[Path],
+    item_type: type[SortableType],
+    merge: ItemMerge[SortableType],
+    *,
+    collect: list[SortableType] | None = None,
+) -> None:
+    """Stream the first output through merge into outputs, appending to collect.
+
+    Raises ValueError, leaving the files as they are, if it can't be loaded.
+    """
+    if not read_shard_manifest(outputs[0]):
+        try:
+            write_output_files(
+                outputs,
+                _collect(merge(iter_output_file(outputs[0], item_type)), collect),
+            )
+        except TypeError, ValueError, yaml.YAMLError:
+            log.info(f"Failed to stream {outputs[0]}, loading it", exc_info=True)
+            if collect is not None:
+                collect.clear()
+        else:
+            return
+    # the history must not be replaced by the new items if it can't be loaded
+    previous_items = sort_items(read_output_file(outputs[0], item_type, strict=True))
+    write_output_files(outputs, _collect(merge(previous_items), collect))
+
+
+def _collect[ItemType](
+    items: Iterable[ItemType], into: list[ItemType] | None
+) -> Iterable[ItemType]:
+    if into is None:
+        return items
+    return _append_to(items, into)
+
+
+def _append_to[ItemType](
+    items: Iterable[ItemType], into: list[ItemType]
+) -> Iterator[ItemType]:
+    for item in items:
+        into.append(item)
+        yield item
+
+
+def _host_slot(url: str) -> threading.BoundedSemaphore:
+    """Return the semaphore limiting concurrent connections to the host of url."""
+    host = urlsplit(url).netloc
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(MAX_CONNECTIONS_PER_HOST)
+        return _host_slots[host]
+
+
+def configure_http_cache(directory: Path | None) -> HttpCache | None:
+    """Enable (or disable with None) the on-disk cache used by http_get."""
+    global _http_cache  # ruff: ignore[global-statement]
+    _http_cache = HttpCache(directory) if directory else None
+    return _http_cache
+
+
+def configure_page_archive(
+    directory: Path | None, *, replay: bool = False
+) -> PageArchive | None:
+    """Record the pages fetched by http_get in directory, or replay them."""
+    global _page_archive  # ruff: ignore[global-statement]
+    _page_archive = PageArchive(directory, replay=replay) if directory else None
+    return _page_archive
+
+
+def new_session(
+    retries: int = HTTP_RETRIES, backoff_factor: float = HTTP_BACKOFF_FACTOR
+) -> requests.Session:
+    """Create a keep-alive session retrying transient errors."""
+    session = requests.Session()
+    # AWS blocks Python requests. Use curl's user-agent to bypass the captcha check.
+    session.headers["user-agent"] = "curl/8.6.0"
+    adapter = HTTPAdapter(
+        pool_maxsize=MAX_CONNECTIONS_PER_HOST,
+        max_retries=Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
         ),
-        encoding="utf-8",
     )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 
-def filter_items[EOLType: "HasEOL"](
-    items: Iterable[EOLType], expired_date: date
-) -> list[EOLType]:
-    """Filter items that are not expired."""
-    return [item for item in items if item.eol > expired_date]
+def configure_http_session(
+    *,
+    retries: int = HTTP_RETRIES,
+    backoff_factor: float = HTTP_BACKOFF_FACTOR,
+    timeout: float = HTTP_TIMEOUT,
+    stream_pages: bool = False,
+) -> requests.Session:
+    """Replace the shared session used by http_get."""
+    global _session, _http_timeout, _stream_pages  # ruff: ignore[global-statement]
+    with _session_lock:
+        _session = new_session(retries=retries, backoff_factor=backoff_factor)
+        _http_timeout = timeout
+        _stream_pages = stream_pages
+        return _session
 
 
-def http_get(url: str) -> str:
-    # AWS blocks Python requests. Use curl's user-agent to bypass the captcha check.
-    return requests.get(url, headers={"user-agent": "curl/8.6.0"}, timeout=60).text
+def get_session() -> requests.Session:
+    """Return the session shared by all commands, created on first use."""
+    global _session  # ruff: ignore[global-statement]
+    with _session_lock:
+        if _session is None:
+            _session = new_session()
+        return _session
+
+
+def http_get(url: str, *, until: TableScanner | None = None) -> str:
+    """Return the page at url.
+
+    With streaming enabled, the download stops as soon as the tables until
+    looks for are complete and the page is cut after them.
+    """
+    archive = _page_archive
+    if archive and archive.replay:
+        return archive.load(url)
+    # the HTTP cache and the page archive need the whole page
+    if until and _stream_pages and not archive and not _http_cache:
+        return _stream(url, until)
+    body = _fetch(url)
+    if archive:
+        archive.store(url, body)
+    return body
+
+
+def _stream(url: str, until: TableScanner) -> str:
+    with _host_slot(url):
+        start = time.perf_counter()
+        with get_session().get(url, timeout=_http_timeout, stream=True) as response:
+            # the same decoding as response.text, which guesses the encoding
+            # from the whole page if the headers don't specify one
+            decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(
+                errors="replace"
+            )
+            for chunk in response.iter_content(STREAM_CHUNK_SIZE):
+                if until.feed(decoder.decode(chunk)):
+                    break
+            else:
+                until.feed(decoder.decode(b"", final=True))
+            received = response.raw.tell()
+        set_metric(
+            "agd_http_request_duration_seconds", time.perf_counter() - start, url=url
+        )
+    set_metric("agd_http_response_bytes", received, url=url)
+    set_metric("agd_http_status", response.status_code, url=url)
+    if until.end is not None and (length := response.headers.get("content-length")):
+        avoided = int(length) - received
+        set_metric("agd_http_bytes_avoided", avoided, url=url)
+        log.info(
+            f"Stopped downloading {url} after {received} bytes, {avoided} bytes avoided"
+        )
+    return until.page
+
+
+def _fetch(url: str) -> str:
+    headers: dict[str, str] = {}
+    cache = _http_cache
+    cached = cache.get(url) if cache else None
+    if cached:
+        headers |= cached.validators()
+
+    with _host_slot(url):
+        start = time.perf_counter()
+        response = get_session().get(url, headers=headers, timeout=_http_timeout)
+        set_metric(
+            "agd_http_request_duration_seconds", time.perf_counter() - start, url=url
+        )
+    set_metric("agd_http_response_bytes", len(response.content), url=url)
+    set_metric("agd_http_status", response.status_code, url=url)
+
+    if not cache:
+        return response.text
+    if cached and response.status_code == requests.codes.not_modified:
+        cache.record_hit(cached)
+        return cached.body
+    cache.record_miss(url)
+    if response.ok:
+        cache.store(
+            CacheEntry(
+                url=url,
+                body=response.text,
+                etag=response.headers.get("etag"),
+                last_modified=response.headers.get("last-modified"),
+            )
+        )
+    return response.text
@@ -0,0 +1,169 @@
+"""Micro benchmarks for the parsers, date parsing and the output file I/O.
+
+Usage:
+    python -m benchmarks.bench run --output before.json
+    python -m benchmarks.bench compare before.json after.json --threshold 0.1
+"""
+
+import json
+import platform
+import statistics
+import tempfile
+import timeit
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING, Annotated, Any
+
+import typer
+
+from aws_generated_data.commands.msk_eol import parse_msk_release_calendar
+from aws_generated_data.commands.rds_eol import (
+    Engine,
+    RdsItem,
+    parse_aws_release_calendar,
+)
+from aws_generated_data.output_formats import OutputFormat
+from aws_generated_data.utils import parse_date, read_output_file, write_output_files
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+ROOT = Path(__file__).parent.parent
+FIXTURES = ROOT / "tests" / "fixtures"
+RDS_OUTPUT = ROOT / "output" / "rds_eol.yaml"
+
+RDS_FIXTURES = {
+    "postgres": "postgresql-release-calendar.html",
+    "mysql": "mysql-release-calendar.html",
+    "aurora-postgresql": "aurora-postgresql-release-calendar.html",
+}
+DATES = {
+    "month_year": "March 2022",
+    "day_month_year": "10 January 2021",
+    "month_day_year": "January 10, 2021",
+    "iso": "2021-01-10",
+}
+
+app = typer.Typer()
+
+
+def write_fresh(output: Path, items: list[Any]) -> None:
+    """Write items to output, which is removed first.
+
+    write_output_files skips an output that is up to date, so writing the
+    same items again would only measure the comparison.
+    """
+    output.unlink(missing_ok=True)
+    write_output_files([output], items)
+
+
+def benchmarks(tmp_dir: Path) -> dict[str, Callable[[], Any]]:
+    benches: dict[str, Callable[[], Any]] = {}
+    for engine_name, fx_file in RDS_FIXTURES.items():
+        benches[f"parse_aws_release_calendar[{engine_name}]"] = partial(
+            parse_aws_release_calendar,
+            (FIXTURES / fx_file).read_text(),
+            Engine(f"{engine_name}:https://dummy"),
+        )
+    benches["parse_msk_release_calendar"] = partial(
+        parse_msk_release_calendar,
+        (FIXTURES / "supported-kafka-versions.html").read_text(),
+    )
+    # parse_date memoizes, uncached measures the parsing itself
+    parse_date_uncached = getattr(parse_date, "__wrapped__", parse_date)
+    for name, date_str in DATES.items():
+        benches[f"parse_date[{name}]"] = partial(parse_date, date_str)
+        benches[f"parse_date[{name},uncached]"] = partial(parse_date_uncached, date_str)
+    benches["read_output_file[rds_eol.yaml]"] = partial(
+        read_output_file, RDS_OUTPUT, RdsItem
+    )
+    rds_items = read_output_file(RDS_OUTPUT, RdsItem)
+    benches["write_output_files[rds_eol.yaml]"] = partial(
+        write_fresh, tmp_dir / "written_rds_eol.yaml", rds_items
+    )
+    for fmt in OutputFormat:
+        if fmt is OutputFormat.YAML or not fmt.available:
+            continue
+        output = tmp_dir / f"rds_eol{fmt.suffix}"
+        write_output_files([output], rds_items)
+        benches[f"read_output_file[{output.name}]"] = partial(
+            read_output_file, output, RdsItem
+        )
+        benches[f"write_output_files[{output.name}]"] = partial(
+            write_fresh, tmp_dir / f"written_{output.name}", rds_items
+        )
+    return benches
+
+
+def measure(func: Callable[[], Any], repeat: int) -> dict[str, float]:
+    """Time func and return the per-call time in seconds."""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    timings = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "number": number,
+    }
+
+
+@app.command()
+def run(
+    output: Annotated[
+        Path | None, typer.Option(help="Save the results to this JSON file")
+    ] = None,
+    repeat: Annotated[int, typer.Option(help="Timing repetitions", min=1)] = 5,
+    name: Annotated[
+        str | None, typer.Option(help="Only run benchmarks containing this string")
+    ] = None,
+) -> None:
+    """Run the benchmarks."""
+    results: dict[str, dict[str, float]] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for bench_name, func in benchmarks(Path(tmp_dir)).items():
+            if name and name not in bench_name:
+                continue
+            results[bench_name] = measure(func, repeat)
+            typer.echo(f"{bench_name:50} {results[bench_name]['min'] * 1e6:12.2f} us")
+
+    if output:
+        output.write_text(
+            json.dumps(
+                {"python": platform.python_version(), "benchmarks": results},
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+
+
+@app.command()
+def compare(
+    baseline: Annotated[Path, typer.Argument(help="Results of the baseline run")],
+    current: Annotated[Path, typer.Argument(help="Results of the current run")],
+    threshold: Annotated[
+        float, typer.Option(help="Allowed slowdown, e.g. 0.1 for 10%", min=0)
+    ] = 0.1,
+) -> None:
+    """Compare two runs and fail if a benchmark got slower than threshold."""
+    base = json.loads(baseline.read_text(encoding="utf-8"))["benchmarks"]
+    curr = json.loads(current.read_text(encoding="utf-8"))["benchmarks"]
+    regressions = []
+    for bench_name in sorted(base.keys() & curr.keys()):
+        ratio = curr[bench_name]["min"] / base[bench_name]["min"]
+        marker = ""
+        if ratio > 1 + threshold:
+            regressions.append(bench_name)
+            marker = "  REGRESSION"
+        typer.echo(
+            f"{bench_name:50} {base[bench_name]['min'] * 1e6:12.2f} us "
+            f"-> {curr[bench_name]['min'] * 1e6:12.2f} us ({ratio:6.2f}x){marker}"
+        )
+    if regressions:
+        typer.echo(
+            f"{len(regressions)} benchmark(s) regressed by more than {threshold:.0%}"
+        )
+        raise typer.Exit(1)
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,66 @@
+import json
+import logging
+from datetime import date
+from typing import TYPE_CHECKING
+
+from benchmarks.bench import app, write_fresh
+from typer.testing import CliRunner
+
+from aws_generated_data.commands.rds_eol import RdsItem
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+runner = CliRunner()
+
+RDS_ITEMS = [RdsItem(engine="postgres", version="17.4", eol=date(2030, 3, 31))]
+
+
+def save_results(path: Path, timings: dict[str, float]) -> Path:
+    path.write_text(
+        json.dumps({
+            "python": "3.14.0",
+            "benchmarks": {
+                name: {"min": t, "median": t, "number": 1}
+                for name, t in timings.items()
+            },
+        }),
+        encoding="utf-8",
+    )
+    return path
+
+
+def test_compare(tmp_path: Path) -> None:
+    baseline = save_results(tmp_path / "before.json", {"a": 1.0, "b": 2.0})
+    # benchmarks only in one of the runs are skipped
+    current = save_results(tmp_path / "after.json", {"a": 1.05, "c": 1.0})
+    result = runner.invoke(app, ["compare", str(baseline), str(current)])
+    assert result.exit_code == 0, result.output
+    assert "1.05x" in result.output
+    assert "REGRESSION" not in result.output
+    assert "b " not in result.output
+
+
+def test_compare_regression(tmp_path: Path) -> None:
+    baseline = save_results(tmp_path / "before.json", {"a": 1.0, "b": 2.0})
+    current = save_results(tmp_path / "after.json", {"a": 1.5, "b": 1.0})
+    result = runner.invoke(
+        app, ["compare", str(baseline), str(current), "--threshold", "0.2"]
+    )
+    assert result.exit_code == 1
+    assert "a " in result.output
+    assert "REGRESSION" in result.output
+    assert "1 benchmark(s) regressed by more than 20%" in result.output
+
+
+def test_write_fresh(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    output = tmp_path / "rds_eol.yaml"
+    write_fresh(output, RDS_ITEMS)
+    caplog.clear()
+    with caplog.at_level(logging.INFO):
+        write_fresh(output, RDS_ITEMS)
+    # the same items are written again instead of skipping the file
+    assert f"Saving to {output}" in caplog.text
+    assert "up to date" not in caplog.text
@@ -0,0 +1,78 @@
+import subprocess
+import sys
+
+import pytest
+from typer.testing import CliRunner
+
+from aws_generated_data.cli import LAZY_COMMANDS, app
+
+runner = CliRunner()
+
+HEAVY_MODULES = {"bs4", "html5lib", "pydantic", "requests", "rich", "yaml"}
+# import time of the CLI on top of typer itself; importing the commands adds
+# ~250 ms
+IMPORT_BUDGET_US = 100_000
+
+
+def import_times(*args: str) -> dict[str, int]:
+    """Cumulative import times in us by module of python -X importtime args."""
+    result = subprocess.run(  # ruff: ignore[subprocess-without-shell-equals-true]
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line.split("|")
+            if cumulative.strip().isdecimal():
+                times[module.strip()] = int(cumulative)
+    return times
+
+
+def test_cli_import_time() -> None:
+    times = import_times("-c", "import aws_generated_data.cli")
+    assert not HEAVY_MODULES & times.keys()
+    assert times["aws_generated_data.cli"] - times["typer"] < IMPORT_BUDGET_US
+
+
+def test_cli_help_is_lazy() -> None:
+    times = import_times("-m", "aws_generated_data", "--help")
+    # rich renders the help output
+    assert not (HEAVY_MODULES - {"rich"}) & times.keys()
+    assert not any(module.startswith("aws_generated_data.commands") for module in times)
+
+
+def test_cli_help() -> None:
+    result = runner.invoke(app, ["--help"])
+    assert result.exit_code == 0
+    for name, lazy in LAZY_COMMANDS.items():
+        assert name in result.stdout
+        assert lazy.help in result.stdout
+
+
+@pytest.mark.parametrize(
+    ("args", "expected"),
+    [
+        (["rds-eol", "--help"], "RDS End of Life related commands."),
+        (["rds-eol", "fetch", "--help"], "Fetch RDS EOL data from AWS"),
+        (["fetch-all", "--help"], "Fetch the RDS and MSK EOL data in one go."),
+        (["query", "--help"], "Look up EOL dates in an output file."),
+    ],
+)
+def test_cli_lazy_command_help(args: list[str], expected: str) -> None:
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0
+    assert expected in result.stdout
+
+
+def test_cli_unknown_command() -> None:
+    result = runner.invoke(app, ["unknown"])
+    assert result.exit_code == 2  # ruff: ignore[magic-value-comparison]
+
+
+@pytest.mark.parametrize("timeout", ["0", "-1"])
+def test_cli_http_timeout_positive(timeout: str) -> None:
+    result = runner.invoke(app, ["--http-timeout", timeout, "query", "--help"])
+    assert result.exit_code == 2  # ruff: ignore[magic-value-comparison]
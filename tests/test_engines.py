@@ -0,0 +1,123 @@
+# ruff: file-ignore[call-datetime-without-tzinfo]
+from datetime import datetime as dt
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from pydantic import ValidationError
+from typer.testing import CliRunner
+
+from aws_generated_data.cli import app
+from aws_generated_data.commands.rds_eol import Engine
+from aws_generated_data.engines import (
+    BUILTIN_PLANS,
+    ExtractionPlan,
+    configure_engines,
+    get_plan,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+runner = CliRunner()
+
+PAGE = """
+<table><tr><td>2.0</td><td>2026-01-31</td></tr></table>
+<h2 id="versions">Versions</h2>
+<table>
+  <tr><th>Version</th><th>Release</th><th>EOL</th></tr>
+  <tr><td>1.0</td><td>2024-01-31</td><td>March 2027</td></tr>
+  <tr><td>1.1</td><td>2024-06-30</td><td>--</td></tr>
+</table>
+"""
+CONFIG = """
+docdb:
+  section_id: versions
+  date_column: 2
+  row_width: 3
+"""
+
+
+@pytest.fixture
+def reset_engines() -> Iterator[None]:
+    yield
+    configure_engines(None)
+
+
+def test_extraction_plan() -> None:
+    plan = ExtractionPlan("versions", date_column=2, row_width=3)
+    assert plan.parse(PAGE, "docdb") == [("1.0", dt(2027, 3, 31))]
+    with pytest.raises(RuntimeError, match="Failed to find any version items"):
+        ExtractionPlan("versions").parse(PAGE, "docdb")
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"table_limit": 0},
+        {"version_column": -1},
+        {"date_column": 4},
+        {"version_column": 2, "row_width": 2},
+    ],
+)
+def test_extraction_plan_invalid(kwargs: dict[str, Any]) -> None:
+    with pytest.raises(ValueError, match="must"):
+        ExtractionPlan(**kwargs)
+
+
+@pytest.mark.usefixtures("reset_engines")
+def test_configure_engines(tmp_path: Path) -> None:
+    config = tmp_path / "engines.yaml"
+    config.write_text(CONFIG)
+    plans = configure_engines(config)
+    assert plans.keys() == {*BUILTIN_PLANS, "docdb"}
+    engine = Engine("docdb:https://example.com/docdb")
+    assert engine.plan == ExtractionPlan("versions", date_column=2, row_width=3)
+    assert engine.plan.parse(PAGE, engine.name) == [("1.0", dt(2027, 3, 31))]
+
+    configure_engines(None)
+    with pytest.raises(ValueError, match="Unsupported engine name: docdb"):
+        get_plan("docdb")
+
+
+@pytest.mark.usefixtures("reset_engines")
+def test_configure_engines_invalid(tmp_path: Path) -> None:
+    config = tmp_path / "engines.yaml"
+    config.write_text("docdb:\n  date_column: 5\n")
+    with pytest.raises(ValidationError):
+        configure_engines(config)
+
+    result = runner.invoke(app, ["--engines-config", str(config), "query", "--help"])
+    # usage error
+    assert result.exit_code == 2  # ruff: ignore[magic-value-comparison]
+
+
+@pytest.mark.usefixtures("reset_engines")
+def test_configure_engines_invalid_yaml(tmp_path: Path) -> None:
+    config = tmp_path / "engines.yaml"
+    config.write_text("docdb: [\n")
+    with pytest.raises(ValueError, match="Failed to load"):
+        configure_engines(config)
+
+    result = runner.invoke(app, ["--engines-config", str(config), "query", "--help"])
+    # usage error
+    assert result.exit_code == 2  # ruff: ignore[magic-value-comparison]
+
+
+@pytest.mark.usefixtures("reset_engines")
+def test_configure_engines_unreadable(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="Failed to load"):
+        configure_engines(tmp_path)
+
+
+@pytest.mark.usefixtures("reset_engines")
+@pytest.mark.parametrize("field", ["section", "table_limt"])
+def test_configure_engines_unknown_field(tmp_path: Path, field: str) -> None:
+    config = tmp_path / "engines.yaml"
+    config.write_text(f"docdb:\n  {field}: versions\n")
+    with pytest.raises(ValidationError, match=field):
+        configure_engines(config)
+
+    result = runner.invoke(app, ["--engines-config", str(config), "query", "--help"])
+    # usage error
+    assert result.exit_code == 2  # ruff: ignore[magic-value-comparison]
@@ -0,0 +1,82 @@
+from datetime import date
+from typing import TYPE_CHECKING
+
+from typer.testing import CliRunner
+
+from aws_generated_data.cli import app
+from aws_generated_data.commands.rds_eol import Engine, RdsItem
+from aws_generated_data.utils import VersionItem, read_output_file
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+runner = CliRunner()
+
+RDS_ITEMS = [RdsItem(engine="postgres", version="17.4", eol=date(2099, 3, 31))]
+MSK_ITEMS = [VersionItem(version="3.7.x", eol=date(2099, 9, 1))]
+
+
+def test_cli_fetch_all(tmp_path: Path, mocker: MockerFixture) -> None:
+    get_rds_eol_data_mock = mocker.patch(
+        "aws_generated_data.commands.rds_eol.get_rds_eol_data",
+        autospec=True,
+        return_value=RDS_ITEMS,
+    )
+    get_msk_eol_data_mock = mocker.patch(
+        "aws_generated_data.commands.msk_eol.get_msk_eol_data",
+        autospec=True,
+        return_value=MSK_ITEMS,
+    )
+    # the same environment as for rds-eol fetch and msk-eol fetch
+    result = runner.invoke(
+        app,
+        ["fetch-all"],
+        env={
+            "AGD_RDS_EOL_ENGINES": "postgres:https://example.com/postgres",
+            "AGD_RDS_EOL_OUTPUT": str(tmp_path / "rds_eol.yaml"),
+            "AGD_RDS_EOL_FORMATS": "yaml json",
+            "AGD_MSK_RELEASE_CALENDAR_URL": "https://example.com/msk",
+            "AGD_MSK_EOL_OUTPUT": str(tmp_path / "msk_eol.yaml"),
+        },
+    )
+    assert result.exit_code == 0
+    get_rds_eol_data_mock.assert_called_once_with(
+        Engine("postgres:https://example.com/postgres")
+    )
+    get_msk_eol_data_mock.assert_called_once_with("https://example.com/msk")
+    assert read_output_file(tmp_path / "rds_eol.yaml", RdsItem) == RDS_ITEMS
+    assert read_output_file(tmp_path / "rds_eol.json", RdsItem) == RDS_ITEMS
+    assert read_output_file(tmp_path / "msk_eol.yaml", VersionItem) == MSK_ITEMS
+
+
+def test_cli_fetch_all_failure(tmp_path: Path, mocker: MockerFixture) -> None:
+    mocker.patch(
+        "aws_generated_data.commands.rds_eol.get_rds_eol_data",
+        autospec=True,
+        side_effect=RuntimeError("Failed to find version table"),
+    )
+    mocker.patch(
+        "aws_generated_data.commands.msk_eol.get_msk_eol_data",
+        autospec=True,
+        return_value=MSK_ITEMS,
+    )
+    result = runner.invoke(
+        app,
+        [
+            "fetch-all",
+            "--engines",
+            "postgres:https://example.com/postgres",
+            "--rds-output",
+            str(tmp_path / "rds_eol.yaml"),
+            "--msk-release-calendar-url",
+            "https://example.com/msk",
+            "--msk-output",
+            str(tmp_path / "msk_eol.yaml"),
+        ],
+    )
+    assert isinstance(result.exception, RuntimeError)
+    # the MSK output is written nonetheless
+    assert not (tmp_path / "rds_eol.yaml").exists()
+    assert read_output_file(tmp_path / "msk_eol.yaml", VersionItem) == MSK_ITEMS
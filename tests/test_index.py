@@ -0,0 +1,158 @@
+from datetime import date
+from typing import TYPE_CHECKING
+
+import pytest
+from typer.testing import CliRunner
+
+from aws_generated_data.cli import app
+from aws_generated_data.commands.rds_eol import RdsItem
+from aws_generated_data.index import EolIndex, load_index
+from aws_generated_data.utils import (
+    VersionItem,
+    write_output_files,
+    write_sharded_output,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+runner = CliRunner()
+
+RDS_ITEMS = [
+    RdsItem(engine="postgres", version="17.4", eol=date(2026, 3, 31)),
+    RdsItem(engine="postgres", version="16.4", eol=date(2025, 10, 31)),
+    RdsItem(engine="postgres", version="16.8", eol=date(2026, 3, 31)),
+    RdsItem(engine="mysql", version="8.0.41", eol=date(2026, 7, 31)),
+    RdsItem(engine="mysql", version="8.0.36", eol=date(2025, 3, 31)),
+]
+
+
+@pytest.fixture
+def index() -> EolIndex[RdsItem]:
+    return EolIndex(RDS_ITEMS)
+
+
+def test_eol_index_get(index: EolIndex[RdsItem]) -> None:
+    assert len(index) == len(RDS_ITEMS)
+    assert index.engines == ["mysql", "postgres"]
+    assert index.get("postgres", "16.4") == RDS_ITEMS[1]
+    assert index.get("mysql", "16.4") is None
+    assert index.get("16.4") is None
+
+
+@pytest.mark.parametrize(
+    ("start", "end", "engine", "expected"),
+    [
+        (None, None, None, ["8.0.36", "16.4", "16.8", "17.4", "8.0.41"]),
+        (None, None, "postgres", ["16.4", "16.8", "17.4"]),
+        # both bounds are inclusive
+        (date(2025, 10, 31), date(2026, 3, 31), None, ["16.4", "16.8", "17.4"]),
+        (date(2025, 11, 1), None, "mysql", ["8.0.41"]),
+        (None, date(2025, 3, 30), None, []),
+        (None, None, "unknown", []),
+    ],
+)
+def test_eol_index_eol_between(
+    index: EolIndex[RdsItem],
+    start: date | None,
+    end: date | None,
+    engine: str | None,
+    expected: list[str],
+) -> None:
+    assert [
+        item.version for item in index.eol_between(start, end, engine=engine)
+    ] == expected
+
+
+def test_eol_index_expiring(index: EolIndex[RdsItem]) -> None:
+    assert index.expiring(30, today=date(2026, 3, 1)) == [RDS_ITEMS[2], RDS_ITEMS[0]]
+    assert index.expiring(30, today=date(2026, 3, 1), engine="mysql") == []
+
+
+def test_load_index(tmp_path: Path) -> None:
+    output_file = tmp_path / "msk_eol.json"
+    write_output_files(
+        [output_file],
+        [
+            VersionItem(version="3.7.x", eol=date(2026, 9, 1)),
+            VersionItem(version="3.6.0", eol=date(2026, 6, 1)),
+        ],
+    )
+    index = load_index(output_file, VersionItem)
+    assert index.engines == []
+    assert index.get("3.7.x") == VersionItem(version="3.7.x", eol=date(2026, 9, 1))
+
+
+@pytest.mark.parametrize(
+    ("args", "exit_code", "expected"),
+    [
+        (
+            ["--engine", "postgres", "--version", "16.4"],
+            0,
+            "postgres 16.4 2025-10-31\n",
+        ),
+        (["--engine", "postgres", "--version", "16.5"], 1, ""),
+        (
+            ["--after", "2026-01-01", "--before", "2026-03-31"],
+            0,
+            "postgres 16.8 2026-03-31\npostgres 17.4 2026-03-31\n",
+        ),
+        (
+            ["--engine", "mysql", "--after", "2026-04-01"],
+            0,
+            "mysql 8.0.41 2026-07-31\n",
+        ),
+    ],
+)
+def test_cli_query(
+    tmp_path: Path, args: list[str], exit_code: int, expected: str
+) -> None:
+    output_file = tmp_path / "rds_eol.yaml"
+    write_output_files([output_file], RDS_ITEMS)
+    result = runner.invoke(app, ["query", str(output_file), *args])
+    assert result.exit_code == exit_code
+    assert result.stdout == expected
+
+
+def test_cli_query_sharded(tmp_path: Path) -> None:
+    output_file = tmp_path / "rds_eol.yaml"
+    write_sharded_output(output_file, RDS_ITEMS, lambda item: item.engine)
+    assert not output_file.exists()
+    result = runner.invoke(app, ["query", str(output_file), "--before", "2025-12-31"])
+    assert result.exit_code == 0
+    assert result.stdout == "mysql 8.0.36 2025-03-31\npostgres 16.4 2025-10-31\n"
+
+
+def test_cli_query_msk(tmp_path: Path) -> None:
+    output_file = tmp_path / "msk_eol.json"
+    write_output_files(
+        [output_file], [VersionItem(version="3.7.x", eol=date(2026, 9, 1))]
+    )
+    result = runner.invoke(app, ["query", str(output_file), "--version", "3.7.x"])
+    assert result.exit_code == 0
+    assert result.stdout == "3.7.x 2026-09-01\n"
+
+
+def test_cli_query_missing_file(tmp_path: Path) -> None:
+    result = runner.invoke(app, ["query", str(tmp_path / "rds_eol.yaml")])
+    # usage error
+    assert result.exit_code == 2  # ruff: ignore[magic-value-comparison]
+
+
+def test_cli_query_invalid_file(tmp_path: Path) -> None:
+    output_file = tmp_path / "rds_eol.json"
+    output_file.write_text("garbage")
+    result = runner.invoke(app, ["query", str(output_file)])
+    # usage error
+    assert result.exit_code == 2  # ruff: ignore[magic-value-comparison]
+
+
+def test_cli_query_missing_engine(tmp_path: Path) -> None:
+    output_file = tmp_path / "rds_eol.yaml"
+    write_output_files([output_file], RDS_ITEMS)
+    # e.g. added by hand
+    with output_file.open("a") as f:
+        f.write("- eol: 2026-01-31\n  version: '16.4'\n")
+    result = runner.invoke(app, ["query", str(output_file), "--version", "16.4"])
+    # usage error instead of an index keyed by version alone
+    assert result.exit_code == 2  # ruff: ignore[magic-value-comparison]
@@ -0,0 +1,131 @@
+from typing import TYPE_CHECKING
+
+import pytest
+from typer.testing import CliRunner
+
+from aws_generated_data.cli import app
+from aws_generated_data.metrics import Metrics, configure_metrics, set_metric
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+    import requests_mock
+    from pytest_mock import MockerFixture
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def reset_metrics() -> Iterator[None]:
+    yield
+    configure_metrics(None)
+
+
+def test_metrics_render(tmp_path: Path) -> None:
+    metrics = Metrics(tmp_path / "agd.prom")
+    metrics.set("agd_items_parsed", 12, source="postgres")
+    metrics.set("agd_items_parsed", 3, source="mysql")
+    metrics.set("agd_http_status", 200, url='https://example.com/"a"')
+    assert metrics.render() == (
+        "# HELP agd_http_status Status code of the last HTTP response\n"
+        "# TYPE agd_http_status gauge\n"
+        'agd_http_status{url="https://example.com/\\"a\\""} 200\n'
+        "# HELP agd_items_parsed Items parsed from the release calendar\n"
+        "# TYPE agd_items_parsed gauge\n"
+        'agd_items_parsed{source="mysql"} 3\n'
+        'agd_items_parsed{source="postgres"} 12\n'
+    )
+    with pytest.raises(ValueError, match="Unknown metric"):
+        metrics.set("agd_unknown", 1)
+
+
+def test_metrics_last_success_carried_over(tmp_path: Path) -> None:
+    metrics_file = tmp_path / "agd.prom"
+    metrics_file.write_text(
+        'agd_items_written{pipeline="rds"} 3\n'
+        'agd_last_success_timestamp_seconds{pipeline="msk"} 1000.0\n'
+        'agd_last_success_timestamp_seconds{pipeline="rds"} 1000.0\n'
+    )
+    metrics = Metrics(metrics_file)
+    metrics.set("agd_last_success_timestamp_seconds", 2000.0, pipeline="msk")
+    metrics.write()
+    assert metrics_file.read_text().splitlines()[2:] == [
+        'agd_last_success_timestamp_seconds{pipeline="msk"} 2000.0',
+        'agd_last_success_timestamp_seconds{pipeline="rds"} 1000.0',
+    ]
+
+
+@pytest.mark.usefixtures("reset_metrics")
+def test_set_metric_disabled() -> None:
+    configure_metrics(None)
+    set_metric("agd_items_parsed", 1, source="postgres")
+
+
+@pytest.mark.usefixtures("reset_metrics")
+def test_cli_metrics_file(
+    tmp_path: Path,
+    fx: Callable[[str], str],
+    requests_mock: requests_mock.Mocker,
+) -> None:
+    url = "https://example.com/msk"
+    requests_mock.get(url, text=fx("supported-kafka-versions.html"))
+    metrics_file = tmp_path / "agd.prom"
+    result = runner.invoke(
+        app,
+        [
+            "--metrics-file",
+            str(metrics_file),
+            "msk-eol",
+            "fetch",
+            "--msk-release-calendar-url",
+            url,
+            "--output",
+            str(tmp_path / "msk_eol.yaml"),
+            "--clean-up-days",
+            "100000",
+        ],
+    )
+    assert result.exit_code == 0
+    samples = dict(
+        line.rsplit(" ", 1)
+        for line in metrics_file.read_text().splitlines()
+        if not line.startswith("#")
+    )
+    assert samples[f'agd_http_status{{url="{url}"}}'] == "200"
+    assert int(samples[f'agd_http_response_bytes{{url="{url}"}}']) > 0
+    assert float(samples['agd_fetch_duration_seconds{source="msk"}']) > 0
+    assert float(samples['agd_parse_duration_seconds{source="msk"}']) > 0
+    parsed = samples['agd_items_parsed{source="msk"}']
+    assert samples['agd_items_merged{pipeline="msk"}'] == parsed
+    assert samples['agd_items_expired{pipeline="msk"}'] == "0"
+    assert samples['agd_items_written{pipeline="msk"}'] == parsed
+    assert 'agd_last_success_timestamp_seconds{pipeline="msk"}' in samples
+
+
+@pytest.mark.usefixtures("reset_metrics")
+def test_cli_metrics_file_failure(tmp_path: Path, mocker: MockerFixture) -> None:
+    mocker.patch(
+        "aws_generated_data.commands.msk_eol.http_get",
+        autospec=True,
+        side_effect=RuntimeError("Connection refused"),
+    )
+    metrics_file = tmp_path / "agd.prom"
+    result = runner.invoke(
+        app,
+        [
+            "--metrics-file",
+            str(metrics_file),
+            "msk-eol",
+            "fetch",
+            "--msk-release-calendar-url",
+            "https://example.com/msk",
+            "--output",
+            str(tmp_path / "msk_eol.yaml"),
+        ],
+    )
+    assert isinstance(result.exception, RuntimeError)
+    # the failed fetch is recorded, but not as success
+    metrics = metrics_file.read_text()
+    assert 'agd_fetch_duration_seconds{source="msk"}' in metrics
+    assert "agd_last_success_timestamp_seconds" not in metrics
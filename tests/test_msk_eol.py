@@ -12,7 +12,11 @@ from aws_generated_data.commands.msk_eol import (
     get_msk_eol_data,
     parse_msk_release_calendar,
 )
-from aws_generated_data.utils import VersionItem
+from aws_generated_data.utils import (
+    VersionItem,
+    merge_output_files,
+    read_output_file,
+)
 
 if TYPE_CHECKING:
     from collections.abc import Callable
@@ -89,17 +93,21 @@ def test_cli_msk_eol_fetch(tmp_path: Path, mocker: MockerFixture) -> None:
         autospec=True,
     )
     date_mock.now.return_value.date.return_value = date(2023, 10, 14)
-    read_output_file_mock = mocker.patch(
-        "aws_generated_data.commands.msk_eol.read_output_file",
+    iter_output_file_mock = mocker.patch(
+        "aws_generated_data.utils.iter_output_file",
         autospec=True,
-        return_value=[
-            VersionItem(version="1.2.4", eol=date(2023, 10, 13)),
-            VersionItem(version="1.2.3", eol=date(2023, 10, 12)),
+        return_value=iter([
             # previously existing item with an outdated EOL date
             VersionItem(version="11.1", eol=date(2025, 1, 1)),
-        ],
+            VersionItem(version="1.2.4", eol=date(2023, 10, 13)),
+            VersionItem(version="1.2.3", eol=date(2023, 10, 12)),
+        ]),
     )
 
+    merge_output_files_mock = mocker.patch(
+        "aws_generated_data.commands.msk_eol.merge_output_files",
+        wraps=merge_output_files,
+    )
     get_msk_eol_data_mock = mocker.patch(
         "aws_generated_data.commands.msk_eol.get_msk_eol_data",
         autospec=True,
@@ -111,9 +119,6 @@ def test_cli_msk_eol_fetch(tmp_path: Path, mocker: MockerFixture) -> None:
             VersionItem(version="5.7", eol=date(2024, 1, 1)),
         ],
     )
-    write_output_file_mock = mocker.patch(
-        "aws_generated_data.commands.msk_eol.write_output_file", autospec=True
-    )
     result = runner.invoke(
         app,
         [
@@ -128,15 +133,44 @@ def test_cli_msk_eol_fetch(tmp_path: Path, mocker: MockerFixture) -> None:
         ],
     )
     assert result.exit_code == 0
-    read_output_file_mock.assert_called_once_with(output_file, VersionItem)
+    iter_output_file_mock.assert_called_once_with(output_file, VersionItem)
+    # the merged items are only written, not kept in memory
+    assert merge_output_files_mock.call_args.kwargs["collect"] is None
     get_msk_eol_data_mock.assert_called_once_with("https://example.com")
-    write_output_file_mock.assert_called_once_with(
-        output_file,
-        [
-            VersionItem(version="8", eol=date(2024, 1, 1)),
-            VersionItem(version="5.7", eol=date(2024, 1, 1)),
-            VersionItem(version="12.2", eol=date(2024, 1, 1)),
-            VersionItem(version="11.1", eol=date(2024, 1, 1)),
-            VersionItem(version="1.2.4", eol=date(2023, 10, 13)),
+    assert read_output_file(output_file, VersionItem) == [
+        VersionItem(version="12.2", eol=date(2024, 1, 1)),
+        VersionItem(version="11.1", eol=date(2024, 1, 1)),
+        VersionItem(version="8", eol=date(2024, 1, 1)),
+        VersionItem(version="5.7", eol=date(2024, 1, 1)),
+        VersionItem(version="1.2.4", eol=date(2023, 10, 13)),
+    ]
+
+
+def test_cli_msk_eol_fetch_without_extension(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    output_file = tmp_path / "msk_eol"
+    mocker.patch(
+        "aws_generated_data.commands.msk_eol.get_msk_eol_data",
+        autospec=True,
+        side_effect=[
+            [VersionItem(version="3.6.0", eol=date(2099, 1, 1))],
+            [VersionItem(version="3.7.x", eol=date(2099, 1, 1))],
         ],
     )
+    args = [
+        "msk-eol",
+        "fetch",
+        "--msk-release-calendar-url",
+        "https://example.com",
+        "--output",
+        str(output_file),
+    ]
+    # the second run reads back the file written by the first one
+    for _ in range(2):
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0, result.output
+    assert read_output_file(output_file, VersionItem, strict=True) == [
+        VersionItem(version="3.7.x", eol=date(2099, 1, 1)),
+        VersionItem(version="3.6.0", eol=date(2099, 1, 1)),
+    ]
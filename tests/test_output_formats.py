@@ -0,0 +1,210 @@
+import json
+from datetime import date
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pytest
+from typer.testing import CliRunner
+
+from aws_generated_data.cli import app
+from aws_generated_data.commands.rds_eol import RdsItem
+from aws_generated_data.output_formats import (
+    OutputFormat,
+    dump,
+    iter_dump,
+    iter_load,
+    load,
+    output_paths,
+)
+from aws_generated_data.utils import (
+    VersionItem,
+    iter_output_file,
+    read_output_file,
+    write_output_files,
+)
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+runner = CliRunner()
+
+OUTPUT_DIR = Path(__file__).parents[1] / "output"
+
+RDS_ITEMS = [
+    RdsItem(engine="postgres", version="17.4", eol=date(2026, 3, 31)),
+    RdsItem(engine="mysql", version="8.0.41", eol=date(2026, 7, 31)),
+]
+FORMATS = [
+    pytest.param(
+        fmt,
+        marks=pytest.mark.skipif(not fmt.available, reason="pyarrow not installed"),
+    )
+    for fmt in OutputFormat
+]
+
+
+@pytest.mark.parametrize(
+    ("path", "expected"),
+    [
+        ("rds_eol.yaml", OutputFormat.YAML),
+        ("rds_eol.yml", OutputFormat.YAML),
+        ("rds_eol.JSON", OutputFormat.JSON),
+        ("rds_eol.jsonl", OutputFormat.JSONL),
+        ("rds_eol.ndjson", OutputFormat.JSONL),
+        ("rds_eol.parquet", OutputFormat.PARQUET),
+        ("rds_eol.arrow", OutputFormat.ARROW),
+        ("rds_eol.feather", OutputFormat.ARROW),
+        # backwards compatible default
+        ("rds_eol", OutputFormat.YAML),
+        ("rds_eol.txt", OutputFormat.YAML),
+    ],
+)
+def test_output_format_from_path(path: str, expected: OutputFormat) -> None:
+    assert OutputFormat.from_path(Path(path)) is expected
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_write_output_file_formats(tmp_path: Path, fmt: OutputFormat) -> None:
+    output_file = tmp_path / f"rds_eol{fmt.suffix}"
+    write_output_files([output_file], RDS_ITEMS)
+    assert read_output_file(output_file, RdsItem) == RDS_ITEMS
+    # the serialization is deterministic, unchanged items aren't written again
+    mtime = output_file.stat().st_mtime_ns
+    write_output_files([output_file], RDS_ITEMS)
+    assert output_file.stat().st_mtime_ns == mtime
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_read_output_file_garbage(tmp_path: Path, fmt: OutputFormat) -> None:
+    output_file = tmp_path / f"rds_eol{fmt.suffix}"
+    output_file.write_text("garbage")
+    assert read_output_file(output_file, RdsItem) == []
+
+
+def test_write_output_file_json(tmp_path: Path) -> None:
+    output_file = tmp_path / "rds_eol.json"
+    write_output_files([output_file], RDS_ITEMS)
+    assert json.loads(output_file.read_text()) == [
+        {"engine": "postgres", "eol": "2026-03-31", "version": "17.4"},
+        {"engine": "mysql", "eol": "2026-07-31", "version": "8.0.41"},
+    ]
+    output_file = tmp_path / "rds_eol.jsonl"
+    write_output_files([output_file], RDS_ITEMS)
+    assert output_file.read_text().splitlines() == [
+        '{"engine": "postgres", "eol": "2026-03-31", "version": "17.4"}',
+        '{"engine": "mysql", "eol": "2026-07-31", "version": "8.0.41"}',
+    ]
+
+
+def test_output_paths() -> None:
+    output = Path("output/rds_eol.yml")
+    assert output_paths(output, None) == [output]
+    assert output_paths(
+        output, [OutputFormat.JSON, OutputFormat.YAML, OutputFormat.JSON]
+    ) == [output, Path("output/rds_eol.json")]
+    # the output file is always the first one, merged with the new items
+    assert output_paths(output, [OutputFormat.JSON]) == [
+        output,
+        Path("output/rds_eol.json"),
+    ]
+
+
+def test_output_paths_unavailable(mocker: MockerFixture) -> None:
+    mocker.patch("importlib.util.find_spec", return_value=None)
+    with pytest.raises(ValueError, match="requires pyarrow"):
+        output_paths(Path("rds_eol.yaml"), [OutputFormat.PARQUET])
+    with pytest.raises(ValueError, match="requires pyarrow"):
+        output_paths(Path("rds_eol.parquet"), None)
+
+
+def test_cli_rds_eol_fetch_formats(tmp_path: Path, mocker: MockerFixture) -> None:
+    output_file = tmp_path / "rds_eol.yaml"
+    # the output file is the one merged with the new items, even if its format
+    # isn't one of the formats
+    write_output_files(
+        [output_file],
+        [RdsItem(engine="postgres", version="9.6", eol=date(2999, 1, 1))],
+    )
+    write_output_files(
+        [tmp_path / "rds_eol.json"],
+        [RdsItem(engine="postgres", version="9.5", eol=date(2999, 1, 1))],
+    )
+    mocker.patch(
+        "aws_generated_data.commands.rds_eol.get_rds_eol_data",
+        autospec=True,
+        return_value=RDS_ITEMS,
+    )
+    result = runner.invoke(
+        app,
+        [
+            "rds-eol",
+            "fetch",
+            "--engines",
+            "postgres:https://example.com",
+            "--output",
+            str(output_file),
+            "--format",
+            "json",
+            "--format",
+            "jsonl",
+        ],
+    )
+    assert result.exit_code == 0
+    expected = [
+        RdsItem(engine="postgres", version="17.4", eol=date(2026, 3, 31)),
+        RdsItem(engine="postgres", version="9.6", eol=date(2999, 1, 1)),
+        RdsItem(engine="mysql", version="8.0.41", eol=date(2026, 7, 31)),
+    ]
+    for name in ("rds_eol.json", "rds_eol.jsonl", "rds_eol.yaml"):
+        assert read_output_file(tmp_path / name, RdsItem) == expected
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+@pytest.mark.parametrize(
+    "records",
+    [
+        [],
+        [
+            {"engine": "postgres", "eol": date(2026, 3, 31), "version": "17.4"},
+            {"engine": "mysql", "eol": date(2026, 7, 31), "version": "8.0"},
+        ],
+    ],
+)
+def test_iter_dump(fmt: OutputFormat, records: list[dict[str, object]]) -> None:
+    assert b"".join(iter_dump(records, fmt)) == dump(records, fmt)
+
+
+@pytest.mark.parametrize(
+    ("name", "item_type"), [("rds_eol.yaml", RdsItem), ("msk_eol.yaml", VersionItem)]
+)
+def test_write_output_files_streamed(
+    tmp_path: Path, name: str, item_type: type[VersionItem]
+) -> None:
+    output_file = OUTPUT_DIR / name
+    with output_file.open("rb") as f:
+        assert list(iter_load(f, OutputFormat.YAML)) == load(
+            output_file.read_bytes(), OutputFormat.YAML
+        )
+    # streaming the items through doesn't change a byte
+    copy = tmp_path / name
+    write_output_files([copy], iter_output_file(output_file, item_type))
+    assert copy.read_bytes() == output_file.read_bytes()
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        "foo: bar\n",
+        "- engine: [postgres]\n",
+        "- engine: &engine postgres\n  version: *engine\n",
+        "- engine: !!python/name:os.system ''\n",
+    ],
+)
+def test_iter_load_yaml_invalid(tmp_path: Path, content: str) -> None:
+    output_file = tmp_path / "rds_eol.yaml"
+    output_file.write_text(content)
+    with (
+        output_file.open("rb") as f,
+        pytest.raises((TypeError, ValueError)),
+    ):
+        list(iter_load(f, OutputFormat.YAML))
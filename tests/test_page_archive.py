@@ -0,0 +1,100 @@
+import gzip
+import json
+from typing import TYPE_CHECKING
+
+import pytest
+from typer.testing import CliRunner
+
+from aws_generated_data.cli import app
+from aws_generated_data.page_archive import PageArchive
+from aws_generated_data.utils import configure_page_archive, http_get
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+    import requests_mock
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def reset_archive() -> Iterator[None]:
+    yield
+    configure_page_archive(None)
+
+
+@pytest.mark.usefixtures("reset_archive")
+def test_http_get_record_replay(
+    tmp_path: Path, requests_mock: requests_mock.Mocker
+) -> None:
+    requests_mock.get("https://example.com/a", text="page")
+    requests_mock.get("https://example.com/b", text="page")
+    archive = configure_page_archive(tmp_path)
+    assert archive
+    assert http_get("https://example.com/a") == "page"
+    assert http_get("https://example.com/b") == "page"
+    # content-addressed: the same page is stored once
+    (page_file,) = (tmp_path / "pages").iterdir()
+    assert gzip.decompress(page_file.read_bytes()) == b"page"
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert manifest.keys() == {"https://example.com/a", "https://example.com/b"}
+    assert manifest["https://example.com/a"]["sha256"] == page_file.name.split(".")[0]
+    assert archive.pages == 2  # ruff: ignore[magic-value-comparison]
+
+    requests_mock.reset()
+    archive = configure_page_archive(tmp_path, replay=True)
+    assert archive
+    assert http_get("https://example.com/a") == "page"
+    assert not requests_mock.called
+    with pytest.raises(RuntimeError, match="not in the page archive"):
+        http_get("https://example.com/c")
+
+
+def test_page_archive_replay_corrupt(tmp_path: Path) -> None:
+    PageArchive(tmp_path).store("https://example.com", "page")
+    (page_file,) = (tmp_path / "pages").iterdir()
+    page_file.write_bytes(gzip.compress(b"other page"))
+    with pytest.raises(RuntimeError, match="Corrupt page archive entry"):
+        PageArchive(tmp_path, replay=True).load("https://example.com")
+
+
+def test_page_archive_replay_missing(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="No page archive"):
+        PageArchive(tmp_path, replay=True)
+
+
+@pytest.mark.usefixtures("reset_archive")
+def test_cli_msk_eol_fetch_record_replay(
+    tmp_path: Path,
+    fx: Callable[[str], str],
+    requests_mock: requests_mock.Mocker,
+) -> None:
+    url = "https://example.com/msk"
+    requests_mock.get(url, text=fx("supported-kafka-versions.html"))
+    args = ["msk-eol", "fetch", "--msk-release-calendar-url", url]
+    args += ["--clean-up-days", "100000"]
+    archive_dir = tmp_path / "archive"
+    result = runner.invoke(
+        app,
+        ["--record", str(archive_dir), *args, "--output", str(tmp_path / "a.yaml")],
+    )
+    assert result.exit_code == 0
+
+    requests_mock.reset()
+    result = runner.invoke(
+        app,
+        ["--replay", str(archive_dir), *args, "--output", str(tmp_path / "b.yaml")],
+    )
+    assert result.exit_code == 0
+    assert not requests_mock.called
+    assert (tmp_path / "a.yaml").read_text() == (tmp_path / "b.yaml").read_text()
+
+
+@pytest.mark.usefixtures("reset_archive")
+def test_cli_record_and_replay(tmp_path: Path) -> None:
+    result = runner.invoke(
+        app, ["--record", str(tmp_path), "--replay", str(tmp_path), "query", "--help"]
+    )
+    # usage error
+    assert result.exit_code == 2  # ruff: ignore[magic-value-comparison]
@@ -0,0 +1,93 @@
+# ruff: file-ignore[call-datetime-without-tzinfo]
+from datetime import datetime as dt
+from typing import TYPE_CHECKING
+
+import pytest
+
+from aws_generated_data.commands.rds_eol import Engine, parse_aws_release_calendar
+from aws_generated_data.parse_cache import (
+    ParseCache,
+    configure_parse_cache,
+    parser_version,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+
+ITEMS = [("1.2.3", dt(2021, 1, 31))]
+
+
+def test_parse_cache_hit(tmp_path: Path, mocker: MockerFixture) -> None:
+    cache = ParseCache(tmp_path)
+    parse = mocker.Mock(return_value=ITEMS)
+    assert cache.parse("page", ("mysql", "section", 2), parse) == ITEMS
+    assert cache.parse("page", ("mysql", "section", 2), parse) == ITEMS
+    parse.assert_called_once_with()
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_parse_cache_key(tmp_path: Path, mocker: MockerFixture) -> None:
+    cache = ParseCache(tmp_path)
+    parse = mocker.Mock(return_value=ITEMS)
+    cache.parse("page", ("mysql", "section", 2), parse)
+    cache.parse("page", ("mysql", "section", 1), parse)
+    cache.parse("other page", ("mysql", "section", 2), parse)
+    assert parse.call_count == 3  # ruff: ignore[magic-value-comparison]
+
+
+def test_parse_cache_eviction(tmp_path: Path) -> None:
+    cache = ParseCache(tmp_path, max_entries=2)
+    for page in ("page1", "page2", "page3"):
+        cache.store(page, ("msk",), ITEMS)
+    assert cache.get("page1", ("msk",)) is None
+    assert cache.get("page3", ("msk",)) == ITEMS
+
+
+def test_parse_cache_eviction_vanished_entry(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    cache = ParseCache(tmp_path, max_entries=1)
+    cache.store("page1", ("msk",), ITEMS)
+    # an entry removed by another process between glob() and stat()
+    entries = [tmp_path / "vanished.json", *tmp_path.glob("*.json")]
+    mocker.patch.object(type(tmp_path), "glob", return_value=entries)
+    cache.store("page2", ("msk",), ITEMS)
+    assert cache.get("page2", ("msk",)) == ITEMS
+
+
+def test_parse_cache_get_evicted_entry(tmp_path: Path, mocker: MockerFixture) -> None:
+    cache = ParseCache(tmp_path)
+    cache.store("page", ("msk",), ITEMS)
+    # evicted by another process after reading it
+    mocker.patch("os.utime", side_effect=FileNotFoundError)
+    assert cache.get("page", ("msk",)) == ITEMS
+
+
+def test_parse_cache_parser_version(tmp_path: Path) -> None:
+    stale = tmp_path / "0123456789abcdef"
+    stale.mkdir()
+    (stale / "entry.json").write_text("[]")
+    ParseCache(tmp_path).store("page", ("msk",), ITEMS)
+    assert [p.name for p in tmp_path.iterdir()] == [parser_version()]
+
+
+@pytest.fixture
+def parse_cache(tmp_path: Path) -> Iterator[ParseCache]:
+    cache = configure_parse_cache(tmp_path)
+    assert cache
+    yield cache
+    configure_parse_cache(None)
+
+
+def test_parse_aws_release_calendar_cached(
+    fx: Callable[[str], str], parse_cache: ParseCache
+) -> None:
+    page = fx("mysql-release-calendar.html")
+    engine = Engine("mysql:https://dummy")
+    expected = parse_aws_release_calendar(page, engine)
+    assert parse_aws_release_calendar(page, engine) == expected
+    assert (parse_cache.hits, parse_cache.misses) == (1, 1)
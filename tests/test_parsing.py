@@ -0,0 +1,220 @@
+from operator import itemgetter
+from typing import TYPE_CHECKING
+
+import pytest
+
+from aws_generated_data.engines import BUILTIN_PLANS
+from aws_generated_data.parsing import (
+    ParserBackend,
+    Table,
+    TableScanner,
+    configure_parse_pool,
+    find_tables,
+    parse_tables,
+    table_fragment,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+
+
+FIXTURES = [
+    (
+        "postgresql-release-calendar.html",
+        "PostgreSQL.Concepts.VersionMgmt.Supported",
+        1,
+    ),
+    ("mysql-release-calendar.html", "MySQL.Concepts.VersionMgmt.Supported", 2),
+    (
+        "aurora-postgresql-release-calendar.html",
+        "aurorapostgresql.minor.versions.supported",
+        1,
+    ),
+    ("supported-kafka-versions.html", None, 1),
+]
+
+
+@pytest.mark.parametrize(("fx_file", "section_id", "table_limit"), FIXTURES)
+def test_find_tables_scoped(
+    fx: Callable[[str], str], fx_file: str, section_id: str | None, table_limit: int
+) -> None:
+    page = fx(fx_file)
+    assert table_fragment(page, table_limit, section_id)
+    scoped = find_tables(page, table_limit, section_id)
+    full = find_tables(page, table_limit, section_id, scoped=False)
+    assert len(scoped) == table_limit
+    assert scoped == full
+
+
+@pytest.mark.parametrize(
+    ("page", "table_limit", "section_id", "expected"),
+    [
+        (
+            '<table id="x"><tr><td>1</td></tr></table><table>2</table>',
+            1,
+            None,
+            '<table id="x"><tr><td>1</td></tr></table>',
+        ),
+        (
+            '<table>1</table><h2 id="sec">s</h2><TABLE>2</TABLE><table>3</table>',
+            2,
+            "sec",
+            "<TABLE>2</TABLE><table>3</table>",
+        ),
+        # nested tables count, but the outer table is always complete
+        (
+            "<table>1<table>2</table>1</table><table>3</table>",
+            2,
+            None,
+            "<table>1<table>2</table>1</table>",
+        ),
+        # the id must be an attribute on its own
+        ('<h2 data-id="sec">s</h2><table>1</table>', 1, "sec", None),
+        # missing section
+        ("<table>1</table>", 1, "sec", None),
+        # unterminated table
+        ("<table>1", 1, None, None),
+        # not enough tables
+        ("<table>1</table>", 2, None, None),
+    ],
+)
+def test_table_fragment(
+    page: str, table_limit: int, section_id: str | None, expected: str | None
+) -> None:
+    assert table_fragment(page, table_limit, section_id) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096, 10**7])
+@pytest.mark.parametrize(("fx_file", "section_id", "table_limit"), FIXTURES)
+def test_table_scanner(
+    fx: Callable[[str], str],
+    fx_file: str,
+    section_id: str | None,
+    table_limit: int,
+    chunk_size: int,
+) -> None:
+    page = fx(fx_file)
+    if chunk_size == 1:
+        # feeding one character at a time is slow, start close to the tables
+        page = page[max(page.find(section_id or "<table") - 500, 0) :]
+    scanner = TableScanner(table_limit, section_id)
+    for start in range(0, len(page), chunk_size):
+        if scanner.feed(page[start : start + chunk_size]):
+            break
+    assert scanner.end
+    assert scanner.page == page[: scanner.end]
+    assert scanner.page.endswith("</table>")
+    fragment = table_fragment(page, table_limit, section_id)
+    assert table_fragment(scanner.page, table_limit, section_id) == fragment
+    # the download stops before the end of the page
+    assert scanner.end < len(page)
+
+
+@pytest.mark.parametrize(
+    ("page", "table_limit", "section_id"),
+    [
+        ("<table>1</table>", 2, None),
+        ('<table>1</table><h2 id="sec">s</h2>', 1, "sec"),
+        ('<h2 id="sec">s</h2><table>1</table', 1, "sec"),
+    ],
+)
+def test_table_scanner_incomplete(
+    page: str, table_limit: int, section_id: str | None
+) -> None:
+    scanner = TableScanner(table_limit, section_id)
+    assert not any(scanner.feed(char) for char in page)
+    assert scanner.page == page
+
+
+@pytest.mark.parametrize("section_id", [None, "sec"])
+def test_table_scanner_scans_chunks_once(section_id: str | None) -> None:
+    scanner = TableScanner(1, section_id)
+    chunk = "<p>" + "x" * 1000 + "</p>"
+    for _ in range(1000):
+        assert not scanner.feed(chunk)
+    # only a small overlap of the scanned text is kept for the next chunk
+    assert len(scanner._tail) < 2 * len(chunk)  # ruff: ignore[private-member-access]
+    assert scanner.feed('<h2 id="sec">s</h2><table>1</table>')
+    assert scanner.page == chunk * 1000 + '<h2 id="sec">s</h2><table>1</table>'
+
+
+def test_find_tables_missing_section() -> None:
+    with pytest.raises(RuntimeError):
+        find_tables("<table>1</table>", 1, "sec")
+
+
+@pytest.mark.parametrize("backend", list(ParserBackend))
+@pytest.mark.parametrize(("fx_file", "section_id", "table_limit"), FIXTURES)
+def test_parser_backend_conformance(
+    fx: Callable[[str], str],
+    fx_file: str,
+    section_id: str | None,
+    table_limit: int,
+    backend: ParserBackend,
+) -> None:
+    if not backend.available:
+        pytest.skip(f"{backend} is not installed")
+    page = fx(fx_file)
+    expected = find_tables(
+        page, table_limit, section_id, backend=ParserBackend.HTML5LIB, scoped=False
+    )
+    assert find_tables(page, table_limit, section_id, backend=backend) == expected
+
+
+def test_parse_tables_fallback() -> None:
+    calls: list[list[Table]] = []
+
+    def extract(tables: list[Table]) -> list[str]:
+        calls.append(tables)
+        if len(calls) == 1:
+            # pretend html.parser messed up the table
+            raise RuntimeError("Failed to find any version items")
+        return tables[0][0]
+
+    page = "<table><tr><td>1</td></tr></table>"
+    assert parse_tables(page, 1, extract, backend=ParserBackend.HTML_PARSER) == ["1"]
+    assert calls == [[[["1"]]], [[["1"]]]]
+
+
+def test_parse_tables_html5lib_fails() -> None:
+    with pytest.raises(RuntimeError):
+        parse_tables("<p>no tables</p>", 1, lambda tables: tables[0][0])
+
+
+# the parse pool pickles the extract function
+calendar_items = BUILTIN_PLANS["mysql"]
+
+
+@pytest.fixture
+def parse_pool() -> Iterator[None]:
+    assert configure_parse_pool(2)
+    yield
+    configure_parse_pool(0)
+
+
+@pytest.mark.usefixtures("parse_pool")
+def test_parse_tables_parse_pool(fx: Callable[[str], str]) -> None:
+    page = fx("mysql-release-calendar.html")
+    section_id = "MySQL.Concepts.VersionMgmt.Supported"
+    # the items are the same as when parsed in this process
+    items = parse_tables(page, 2, calendar_items, section_id)
+    configure_parse_pool(0)
+    assert items == parse_tables(page, 2, calendar_items, section_id)
+
+
+@pytest.mark.usefixtures("parse_pool")
+def test_parse_tables_parse_pool_error() -> None:
+    with pytest.raises(RuntimeError, match="Failed to find version table"):
+        parse_tables("<p>no tables</p>", 1, calendar_items)
+
+
+def test_parse_tables_fallback_disagreement(caplog: pytest.LogCaptureFixture) -> None:
+    # html.parser nests the second row in the first one
+    page = "<table><tr><td>1</td><tr><td>2</td></table>"
+    with pytest.raises(RuntimeError, match="disagrees"):
+        find_tables(page, 1, backend=ParserBackend.HTML_PARSER)
+    assert parse_tables(page, 1, itemgetter(0), backend=ParserBackend.HTML_PARSER) == [
+        ["1"],
+        ["2"],
+    ]
+    assert "falling back to html5lib" in caplog.text
@@ -0,0 +1,99 @@
+import logging
+import pstats
+from typing import TYPE_CHECKING
+
+import pytest
+from typer.testing import CliRunner
+
+from aws_generated_data import profiling
+from aws_generated_data.cli import app
+from aws_generated_data.profiling import configure_profiler, phase
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+runner = CliRunner()
+
+
+@pytest.fixture
+def reset_profiler() -> Iterator[None]:
+    yield
+    configure_profiler(enabled=False)
+
+
+@pytest.mark.usefixtures("reset_profiler")
+def test_phase_disabled() -> None:
+    configure_profiler(enabled=False)
+    with phase("parse", "postgres"):
+        pass
+    assert profiling._profiler is None  # ruff: ignore[private-member-access]
+
+
+@pytest.mark.usefixtures("reset_profiler")
+def test_phase(caplog: pytest.LogCaptureFixture) -> None:
+    profiler = configure_profiler(enabled=True)
+    assert profiler
+    for _ in range(2):
+        with phase("parse", "postgres"):
+            pass
+    with phase("fetch", "postgres"), phase("fetch", "mysql"):
+        pass
+    with pytest.raises(RuntimeError), phase("merge", "rds"):
+        raise RuntimeError
+
+    assert [(key, stats.calls) for key, stats in profiler.phases.items()] == [
+        (("postgres", "parse"), 2),
+        (("mysql", "fetch"), 1),
+        (("postgres", "fetch"), 1),
+        (("rds", "merge"), 1),
+    ]
+    with caplog.at_level(logging.INFO):
+        profiler.close()
+    # grouped by label, in pipeline order
+    _, _, *lines, total = caplog.messages[0].splitlines()
+    assert [line.split()[:2] for line in lines] == [
+        ["mysql", "fetch"],
+        ["postgres", "fetch"],
+        ["postgres", "parse"],
+        ["rds", "merge"],
+    ]
+    assert total.startswith("total")
+
+
+@pytest.mark.usefixtures("reset_profiler")
+def test_cli_profile(
+    tmp_path: Path, mocker: MockerFixture, caplog: pytest.LogCaptureFixture
+) -> None:
+    mocker.patch(
+        "aws_generated_data.commands.rds_eol.http_get",
+        autospec=True,
+        return_value="<html></html>",
+    )
+    mocker.patch(
+        "aws_generated_data.commands.rds_eol.parse_aws_release_calendar",
+        autospec=True,
+        return_value=[],
+    )
+    pstats_file = tmp_path / "agd.pstats"
+    with caplog.at_level(logging.INFO):
+        result = runner.invoke(
+            app,
+            [
+                "--profile-output",
+                str(pstats_file),
+                "rds-eol",
+                "fetch",
+                "--engines",
+                "postgres:https://example.com/postgres",
+                "--output",
+                str(tmp_path / "rds_eol.yaml"),
+            ],
+        )
+    assert result.exit_code == 0
+    summary = next(m for m in caplog.messages if m.startswith("Profile:"))
+    for name in ("fetch", "parse", "validate", "merge"):
+        assert f" {name} " in summary
+    assert pstats.Stats(str(pstats_file)).total_calls  # type: ignore[attr-defined]
@@ -1,6 +1,8 @@
 # ruff: file-ignore[call-datetime-without-tzinfo]
+import time
 from datetime import date
 from datetime import datetime as dt
+from operator import attrgetter
 from typing import TYPE_CHECKING
 
 import pytest
@@ -15,6 +17,12 @@ from aws_generated_data.commands.rds_eol import (
     get_rds_eol_data,
     parse_aws_release_calendar,
 )
+from aws_generated_data.utils import (
+    merge_output_files,
+    read_output_file,
+    read_shard_manifest,
+    write_sharded_output,
+)
 
 if TYPE_CHECKING:
     from collections.abc import Callable
@@ -165,39 +173,42 @@ def test_cli_rds_eol_fetch(tmp_path: Path, mocker: MockerFixture) -> None:
         autospec=True,
     )
     date_mock.now.return_value.date.return_value = date(2023, 10, 14)
-    read_output_file_mock = mocker.patch(
-        "aws_generated_data.commands.rds_eol.read_output_file",
+    iter_output_file_mock = mocker.patch(
+        "aws_generated_data.utils.iter_output_file",
         autospec=True,
-        return_value=[
-            RdsItem(engine="manual-added", version="1.2.4", eol=date(2024, 1, 1)),
+        return_value=iter([
+            # previously existing item with an outdated EOL date
+            RdsItem(engine="postgres", version="11.1", eol=date(2025, 1, 1)),
+            RdsItem(engine="obsolete-one", version="1.2.3", eol=date(2023, 10, 12)),
             RdsItem(
                 engine="manual-added-but-not-yet-obsolete",
                 version="1.2.4",
                 eol=date(2023, 10, 13),
             ),
-            RdsItem(engine="obsolete-one", version="1.2.3", eol=date(2023, 10, 12)),
-            # previously existing item with an outdated EOL date
-            RdsItem(engine="postgres", version="11.1", eol=date(2025, 1, 1)),
-        ],
+            RdsItem(engine="manual-added", version="1.2.4", eol=date(2024, 1, 1)),
+        ]),
     )
 
+    engine_items = {
+        "postgres": [
+            # overwrite the existing item postgres:11.1
+            RdsItem(engine="postgres", version="11.1", eol=date(2024, 1, 1)),
+            RdsItem(engine="postgres", version="12.2", eol=date(2024, 1, 1)),
+        ],
+        "mysql": [
+            RdsItem(engine="mysql", version="8", eol=date(2024, 1, 1)),
+            RdsItem(engine="mysql", version="5.7", eol=date(2024, 1, 1)),
+        ],
+    }
+    merge_output_files_mock = mocker.patch(
+        "aws_generated_data.commands.rds_eol.merge_output_files",
+        wraps=merge_output_files,
+    )
+    # engines are fetched concurrently, the call order is not guaranteed
     get_rds_eol_data_mock = mocker.patch(
         "aws_generated_data.commands.rds_eol.get_rds_eol_data",
         autospec=True,
-        side_effect=[
-            [
-                # overwrite the existing item postgres:11.1
-                RdsItem(engine="postgres", version="11.1", eol=date(2024, 1, 1)),
-                RdsItem(engine="postgres", version="12.2", eol=date(2024, 1, 1)),
-            ],
-            [
-                RdsItem(engine="mysql", version="8", eol=date(2024, 1, 1)),
-                RdsItem(engine="mysql", version="5.7", eol=date(2024, 1, 1)),
-            ],
-        ],
-    )
-    write_output_file_mock = mocker.patch(
-        "aws_generated_data.commands.rds_eol.write_output_file", autospec=True
+        side_effect=lambda engine: engine_items[engine.name],
     )
     result = runner.invoke(
         app,
@@ -215,23 +226,131 @@ def test_cli_rds_eol_fetch(tmp_path: Path, mocker: MockerFixture) -> None:
         ],
     )
     assert result.exit_code == 0
-    read_output_file_mock.assert_called_once_with(output_file, RdsItem)
-    get_rds_eol_data_mock.assert_has_calls([
-        mocker.call(Engine("postgres:https://example.com/postgres")),
-        mocker.call(Engine("mysql:https://example.com/mysql")),
+    iter_output_file_mock.assert_called_once_with(output_file, RdsItem)
+    # the merged items are only written, not kept in memory
+    assert merge_output_files_mock.call_args.kwargs["collect"] is None
+    get_rds_eol_data_mock.assert_has_calls(
+        [
+            mocker.call(Engine("postgres:https://example.com/postgres")),
+            mocker.call(Engine("mysql:https://example.com/mysql")),
+        ],
+        any_order=True,
+    )
+    assert read_output_file(output_file, RdsItem) == ([
+        RdsItem(engine="postgres", version="12.2", eol=date(2024, 1, 1)),
+        RdsItem(engine="postgres", version="11.1", eol=date(2024, 1, 1)),
+        RdsItem(engine="mysql", version="8", eol=date(2024, 1, 1)),
+        RdsItem(engine="mysql", version="5.7", eol=date(2024, 1, 1)),
+        RdsItem(
+            engine="manual-added-but-not-yet-obsolete",
+            version="1.2.4",
+            eol=date(2023, 10, 13),
+        ),
+        RdsItem(engine="manual-added", version="1.2.4", eol=date(2024, 1, 1)),
     ])
-    write_output_file_mock.assert_called_once_with(
+
+
+def test_cli_rds_eol_fetch_merge_order(tmp_path: Path, mocker: MockerFixture) -> None:
+    output_file = tmp_path / "output.yaml"
+
+    def get_rds_eol_data(engine: Engine) -> list[RdsItem]:
+        if engine.url.endswith("slow"):
+            # let the second engine finish first
+            time.sleep(0.1)
+        return [RdsItem(engine=engine.name, version="1.0", eol=engine_eol[engine.url])]
+
+    engine_eol = {
+        "https://example.com/slow": date(2030, 1, 1),
+        "https://example.com/fast": date(2031, 1, 1),
+    }
+    mocker.patch(
+        "aws_generated_data.commands.rds_eol.get_rds_eol_data",
+        autospec=True,
+        side_effect=get_rds_eol_data,
+    )
+    result = runner.invoke(
+        app,
+        [
+            "rds-eol",
+            "fetch",
+            "--engines",
+            "postgres:https://example.com/slow",
+            "--engines",
+            "postgres:https://example.com/fast",
+            "--output",
+            str(output_file),
+            "--max-workers",
+            "2",
+        ],
+    )
+    assert result.exit_code == 0
+    # the last engine on the command line wins, like in a sequential run
+    assert read_output_file(output_file, RdsItem) == [
+        RdsItem(engine="postgres", version="1.0", eol=date(2031, 1, 1))
+    ]
+
+
+def test_cli_rds_eol_fetch_shard(tmp_path: Path, mocker: MockerFixture) -> None:
+    output_file = tmp_path / "rds_eol.yaml"
+    write_sharded_output(
         output_file,
         [
-            RdsItem(engine="postgres", version="12.2", eol=date(2024, 1, 1)),
-            RdsItem(engine="postgres", version="11.1", eol=date(2024, 1, 1)),
-            RdsItem(engine="mysql", version="8", eol=date(2024, 1, 1)),
-            RdsItem(engine="mysql", version="5.7", eol=date(2024, 1, 1)),
-            RdsItem(
-                engine="manual-added-but-not-yet-obsolete",
-                version="1.2.4",
-                eol=date(2023, 10, 13),
-            ),
-            RdsItem(engine="manual-added", version="1.2.4", eol=date(2024, 1, 1)),
+            RdsItem(engine="expired", version="1.0", eol=date(2000, 1, 1)),
+            RdsItem(engine="mysql", version="8.0", eol=date(2099, 1, 1)),
+            RdsItem(engine="postgres", version="11.1", eol=date(2099, 1, 1)),
+        ],
+        attrgetter("engine"),
+    )
+    mysql_shard = tmp_path / "rds_eol" / "mysql.yaml"
+    mtime = mysql_shard.stat().st_mtime_ns
+    read_output_file_mock = mocker.patch(
+        "aws_generated_data.commands.rds_eol.read_output_file",
+        autospec=True,
+        side_effect=read_output_file,
+    )
+    mocker.patch(
+        "aws_generated_data.commands.rds_eol.get_rds_eol_data",
+        autospec=True,
+        return_value=[RdsItem(engine="postgres", version="12.2", eol=date(2099, 1, 1))],
+    )
+    result = runner.invoke(
+        app,
+        [
+            "rds-eol",
+            "fetch",
+            "--engines",
+            "postgres:https://example.com/postgres",
+            "--output",
+            str(output_file),
+            "--shard",
+        ],
+    )
+    assert result.exit_code == 0
+    # the shard of the other engine is neither loaded nor rewritten
+    read_output_file_mock.assert_called_once_with(
+        output_file, RdsItem, shards={"postgres", "expired"}, strict=True
+    )
+    assert mysql_shard.stat().st_mtime_ns == mtime
+    assert not output_file.exists()
+    assert sorted(read_shard_manifest(output_file)) == ["mysql.yaml", "postgres.yaml"]
+    assert read_output_file(output_file, RdsItem, shards={"postgres"}) == [
+        RdsItem(engine="postgres", version="12.2", eol=date(2099, 1, 1)),
+        RdsItem(engine="postgres", version="11.1", eol=date(2099, 1, 1)),
+    ]
+
+
+def test_cli_rds_eol_fetch_shard_without_extension(tmp_path: Path) -> None:
+    result = runner.invoke(
+        app,
+        [
+            "rds-eol",
+            "fetch",
+            "--engines",
+            "postgres:https://example.com/postgres",
+            "--output",
+            str(tmp_path / "rds_eol"),
+            "--shard",
         ],
     )
+    # usage error
+    assert result.exit_code == 2  # ruff: ignore[magic-value-comparison]
@@ -0,0 +1,249 @@
+import threading
+from datetime import date
+from typing import TYPE_CHECKING
+
+import pytest
+import requests
+from typer.testing import CliRunner
+
+from aws_generated_data.cli import app
+from aws_generated_data.commands.rds_eol import RdsItem
+from aws_generated_data.commands.serve import (
+    Dataset,
+    SnapshotServer,
+    collect_items,
+    etag_matches,
+    refresh_loop,
+)
+from aws_generated_data.metrics import configure_metrics, set_metric
+from aws_generated_data.output_formats import OutputFormat
+from aws_generated_data.utils import VersionItem, dump_items, write_output_files
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+runner = CliRunner()
+
+RDS_ITEMS = [RdsItem(engine="postgres", version="17.4", eol=date(2099, 3, 31))]
+MSK_ITEMS = [VersionItem(version="3.7.x", eol=date(2099, 9, 1))]
+
+
+def fail() -> list[RdsItem]:
+    raise RuntimeError("Failed to find version table")
+
+
+@pytest.fixture
+def datasets() -> list[Dataset]:
+    rds = Dataset("rds_eol", lambda: RDS_ITEMS)
+    rds.run_refresh()
+    return [rds, Dataset("msk_eol", lambda: MSK_ITEMS)]
+
+
+@pytest.fixture
+def server_url(datasets: list[Dataset]) -> Iterator[str]:
+    server = SnapshotServer(("127.0.0.1", 0), datasets)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_serve_etag(server_url: str) -> None:
+    response = requests.get(f"{server_url}/rds_eol.json", timeout=10)
+    assert response.status_code == requests.codes.ok
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == dump_items(RDS_ITEMS, OutputFormat.JSON)
+    etag = response.headers["etag"]
+
+    response = requests.get(
+        f"{server_url}/rds_eol.json", headers={"if-none-match": etag}, timeout=10
+    )
+    assert response.status_code == requests.codes.not_modified
+    assert not response.content
+
+    response = requests.get(f"{server_url}/rds_eol.yaml", timeout=10)
+    assert response.content == dump_items(RDS_ITEMS, OutputFormat.YAML)
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "expected"),
+    [
+        ('"abc"', True),
+        ('"x", "abc"', True),
+        ('W/"abc"', True),
+        ("*", True),
+        ('"ab"', False),
+        ('"abcd"', False),
+        ('"xabc", "abcx"', False),
+        ("", False),
+    ],
+)
+def test_etag_matches(if_none_match: str, *, expected: bool) -> None:
+    assert etag_matches(if_none_match, '"abc"') == expected
+
+
+@pytest.mark.parametrize(
+    ("path", "status_code"),
+    [
+        ("/msk_eol.json", requests.codes.service_unavailable),
+        ("/rds_eol.txt", requests.codes.not_found),
+        ("/unknown.json", requests.codes.not_found),
+    ],
+)
+def test_serve_errors(server_url: str, path: str, status_code: int) -> None:
+    assert requests.get(f"{server_url}{path}", timeout=10).status_code == status_code
+
+
+def test_serve_status(server_url: str, datasets: list[Dataset]) -> None:
+    datasets[1].refresh = fail
+    datasets[1].run_refresh()
+    status = requests.get(f"{server_url}/status", timeout=10).json()
+    assert status["rds_eol"]["items"] == 1
+    assert status["rds_eol"]["updated_at"]
+    assert status["msk_eol"] == {
+        "items": 0,
+        "updated_at": None,
+        "error": "Failed to find version table",
+    }
+
+
+def test_dataset_refresh_failure(datasets: list[Dataset]) -> None:
+    rds = datasets[0]
+    body = rds.body(OutputFormat.JSON)
+    rds.refresh = fail
+    rds.run_refresh()
+    # the previous items are still served
+    assert rds.body(OutputFormat.JSON) == body
+    assert rds.error == "Failed to find version table"
+    rds.refresh = lambda: RDS_ITEMS
+    rds.run_refresh()
+    assert rds.error is None
+
+
+def test_collect_items() -> None:
+    def fetch(output: str, *, collect: list[VersionItem] | None = None) -> None:
+        assert output == "msk_eol.yaml"
+        if collect is not None:
+            collect += MSK_ITEMS
+
+    assert collect_items(fetch, "msk_eol.yaml") == MSK_ITEMS
+
+
+def test_refresh_loop(datasets: list[Dataset]) -> None:
+    stop = threading.Event()
+    refreshes = []
+
+    def refresh() -> list[VersionItem]:
+        refreshes.append(1)
+        if len(refreshes) == 2:  # ruff: ignore[magic-value-comparison]
+            stop.set()
+        return MSK_ITEMS
+
+    datasets[1].refresh = refresh
+    refresh_loop(datasets, 0, stop)
+    assert len(refreshes) == 2  # ruff: ignore[magic-value-comparison]
+    assert datasets[1].status()["items"] == 1
+
+
+@pytest.fixture
+def reset_metrics() -> Iterator[None]:
+    yield
+    configure_metrics(None)
+
+
+@pytest.mark.usefixtures("reset_metrics")
+def test_refresh_loop_metrics(datasets: list[Dataset], tmp_path: Path) -> None:
+    metrics_file = tmp_path / "agd.prom"
+    configure_metrics(metrics_file)
+    stop = threading.Event()
+
+    def refresh() -> list[VersionItem]:
+        set_metric("agd_items_written", len(MSK_ITEMS), source="msk")
+        stop.set()
+        return MSK_ITEMS
+
+    datasets[1].refresh = refresh
+    refresh_loop(datasets, 0, stop)
+    # written after the round, not only when the process exits
+    assert 'agd_items_written{source="msk"} 1' in metrics_file.read_text()
+
+
+def test_cli_serve(tmp_path: Path, mocker: MockerFixture) -> None:
+    write_output_files([tmp_path / "rds_eol.yaml"], RDS_ITEMS)
+    mocker.patch(
+        "aws_generated_data.commands.rds_eol.fetch_rds_eol",
+        autospec=True,
+        side_effect=lambda *_, collect, **__: collect.extend(RDS_ITEMS),
+    )
+    mocker.patch(
+        "aws_generated_data.commands.msk_eol.fetch_msk_eol",
+        autospec=True,
+        side_effect=lambda *_, collect, **__: collect.extend(MSK_ITEMS),
+    )
+    serve_forever_mock = mocker.patch.object(
+        SnapshotServer, "serve_forever", autospec=True, side_effect=KeyboardInterrupt
+    )
+    result = runner.invoke(
+        app,
+        [
+            "serve",
+            "--engines",
+            "postgres:https://example.com/postgres",
+            "--rds-output",
+            str(tmp_path / "rds_eol.yaml"),
+            "--msk-release-calendar-url",
+            "https://example.com/msk",
+            "--msk-output",
+            str(tmp_path / "msk_eol.yaml"),
+            "--port",
+            "0",
+        ],
+    )
+    assert result.exit_code == 0
+    (server,), _ = serve_forever_mock.call_args
+    # the previous output is served before the first refresh
+    assert server.datasets["rds_eol"].status()["items"] == 1
+
+
+def test_cli_serve_invalid_output(tmp_path: Path, mocker: MockerFixture) -> None:
+    (tmp_path / "rds_eol.yaml").write_text("- engine: postgres\n  eol: [\n")
+    mocker.patch(
+        "aws_generated_data.commands.rds_eol.fetch_rds_eol",
+        autospec=True,
+        side_effect=RuntimeError("Failed to find version table"),
+    )
+    mocker.patch(
+        "aws_generated_data.commands.msk_eol.fetch_msk_eol",
+        autospec=True,
+        side_effect=lambda *_, collect, **__: collect.extend(MSK_ITEMS),
+    )
+    serve_forever_mock = mocker.patch.object(
+        SnapshotServer, "serve_forever", autospec=True, side_effect=KeyboardInterrupt
+    )
+    result = runner.invoke(
+        app,
+        [
+            "serve",
+            "--engines",
+            "postgres:https://example.com/postgres",
+            "--rds-output",
+            str(tmp_path / "rds_eol.yaml"),
+            "--msk-release-calendar-url",
+            "https://example.com/msk",
+            "--msk-output",
+            str(tmp_path / "msk_eol.yaml"),
+            "--port",
+            "0",
+        ],
+    )
+    assert result.exit_code == 0
+    (server,), _ = serve_forever_mock.call_args
+    # the corrupt file isn't served as an empty dataset
+    status = server.datasets["rds_eol"].status()
+    assert status["updated_at"] is None
+    assert status["error"]
@@ -1,25 +1,48 @@
 # ruff: file-ignore[call-datetime-without-tzinfo]
+import hashlib
+from dataclasses import FrozenInstanceError
 from datetime import date
 from datetime import datetime as dt
+from operator import attrgetter
 from typing import TYPE_CHECKING
 
 import pytest
 import yaml
-from pydantic import BaseModel
+from pydantic import ValidationError
+from requests.adapters import HTTPAdapter
 
 from aws_generated_data.commands.rds_eol import RdsItem
+from aws_generated_data.output_formats import OutputFormat
+from aws_generated_data.parsing import TableScanner
 from aws_generated_data.utils import (
-    Root,
+    ItemMerge,
+    UnsortedItemsError,
     VersionItem,
-    filter_items,
+    configure_http_cache,
+    configure_http_session,
+    dump_items,
+    get_session,
+    http_get,
+    items_adapter,
+    merge_output_files,
+    normalize_version,
     parse_date,
     read_output_file,
-    write_output_file,
+    read_shard_manifest,
+    sort_items,
+    validate_items,
+    version_key,
+    write_output_files,
+    write_sharded_output,
 )
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
     from pathlib import Path
 
+    import requests_mock
+    from pytest_mock import MockerFixture
+
 
 @pytest.mark.parametrize(
     ("date_str", "expected"),
@@ -29,44 +52,50 @@ if TYPE_CHECKING:
         ("15 July 1979", dt(1979, 7, 15)),
         ("January 2021", dt(2021, 1, 31)),
         ("September 2021", dt(2021, 9, 30)),
+        ("February 2024", dt(2024, 2, 29)),
+        ("march 2022", dt(2022, 3, 31)),
+        ("2021-01-10", dt(2021, 1, 10)),
         pytest.param(
             "just an arbitry string",
             None,
             marks=pytest.mark.xfail(strict=True, raises=ValueError),
         ),
+        pytest.param(
+            "31 February 2021",
+            None,
+            marks=pytest.mark.xfail(strict=True, raises=ValueError),
+        ),
+        pytest.param(
+            "Sept 2021",
+            None,
+            marks=pytest.mark.xfail(strict=True, raises=ValueError),
+        ),
+        pytest.param(
+            "January 010, 2021",
+            None,
+            marks=pytest.mark.xfail(strict=True, raises=ValueError),
+        ),
+        pytest.param(
+            "2021-1-10",
+            None,
+            marks=pytest.mark.xfail(strict=True, raises=ValueError),
+        ),
     ],
 )
 def test_parse_date(date_str: str, expected: dt) -> None:
     assert parse_date(date_str) == expected
 
 
-class EolItem(BaseModel):
-    name: str
-    eol: date
-
-
-@pytest.mark.parametrize(
-    ("items", "expired_date", "expected"),
-    [
-        (
-            [
-                EolItem(name="item1", eol=date(2021, 1, 1)),
-                EolItem(name="item2", eol=date(2022, 1, 1)),
-                EolItem(name="item2", eol=date(2022, 1, 2)),
-                EolItem(name="item3", eol=date(2023, 1, 1)),
-            ],
-            date(2022, 1, 1),
-            [
-                EolItem(name="item2", eol=date(2022, 1, 2)),
-                EolItem(name="item3", eol=date(2023, 1, 1)),
-            ],
-        ),
-    ],
-)
-def test_filter_items(
-    items: list[EolItem], expired_date: date, expected: list[EolItem]
-) -> None:
-    assert filter_items(items, expired_date) == expected
+def test_item_merge_expired() -> None:
+    items = [
+        VersionItem(version="3.0", eol=date(2023, 1, 1)),
+        VersionItem(version="2.1", eol=date(2022, 1, 2)),
+        VersionItem(version="2.0", eol=date(2022, 1, 1)),
+        VersionItem(version="1.0", eol=date(2021, 1, 1)),
+    ]
+    merge = ItemMerge(items[2:], date(2022, 1, 1))
+    assert list(merge(items[:2])) == items[:2]
+    assert merge.expired == 2  # ruff: ignore[magic-value-comparison]
 
 
 RDS_ITEMS = [
@@ -89,7 +118,10 @@ RDS_ITEMS = [
         # another yaml file
         (yaml.dump([{"foo": "bar"}]), []),
         # real yaml file
-        (yaml.dump(Root(sorted(RDS_ITEMS, reverse=True)).model_dump()), RDS_ITEMS),
+        (
+            yaml.dump(items_adapter(RdsItem).dump_python(RDS_ITEMS)),
+            RDS_ITEMS,
+        ),
     ],
 )
 def test_read_output_file(
@@ -103,10 +135,202 @@ def test_read_output_file(
 
 def test_write_output_file(tmp_path: Path) -> None:
     output_file = tmp_path / "output.yaml"
-    write_output_file(output_file, RDS_ITEMS)
+    write_output_files([output_file], RDS_ITEMS)
     assert read_output_file(output_file, RdsItem) == RDS_ITEMS
 
 
+def test_write_output_file_unchanged(tmp_path: Path) -> None:
+    output_file = tmp_path / "output.yaml"
+    write_output_files([output_file], RDS_ITEMS)
+    output_file.chmod(0o664)
+    mtime = output_file.stat().st_mtime_ns
+    write_output_files([output_file], RDS_ITEMS)
+    assert output_file.stat().st_mtime_ns == mtime
+
+    write_output_files([output_file], RDS_ITEMS[:1])
+    assert read_output_file(output_file, RdsItem) == RDS_ITEMS[:1]
+    # the file is replaced, but keeps its permissions
+    assert output_file.stat().st_mode & 0o777 == 0o664  # ruff: ignore[magic-value-comparison]
+    assert [p.name for p in tmp_path.iterdir()] == ["output.yaml"]
+
+
+def test_write_output_file_atomic(tmp_path: Path, mocker: MockerFixture) -> None:
+    output_file = tmp_path / "output.yaml"
+    write_output_files([output_file], RDS_ITEMS)
+    mocker.patch("aws_generated_data.atomic.os.fsync", side_effect=OSError)
+    with pytest.raises(OSError):  # ruff: ignore[pytest-raises-too-broad]
+        write_output_files([output_file], RDS_ITEMS[:1])
+    # the previous content survives a failed write
+    assert read_output_file(output_file, RdsItem) == RDS_ITEMS
+    assert [p.name for p in tmp_path.iterdir()] == ["output.yaml"]
+
+
+def test_write_output_file_format(tmp_path: Path) -> None:
+    output_file = tmp_path / "output.yaml"
+    items = [
+        *RDS_ITEMS,
+        RdsItem(engine="postgres", version="18.4", eol=date(2027, 9, 30)),
+        RdsItem(engine="postgres", version="17", eol=date(2027, 9, 30)),
+        RdsItem(engine="msk", version="3.7.x", eol=date(2026, 9, 1)),
+    ]
+    write_output_files([output_file], items)
+    # the format must not change, downstream consumers rely on it
+    assert output_file.read_text() == yaml.dump(
+        items_adapter(RdsItem).dump_python(items),
+        explicit_start=True,
+        indent=2,
+        default_flow_style=False,
+    )
+
+
+def test_write_output_files(tmp_path: Path) -> None:
+    outputs = [tmp_path / "output.yaml", tmp_path / "output.json"]
+    write_output_files(outputs, iter(RDS_ITEMS))
+    for output_file in outputs:
+        assert output_file.read_bytes() == dump_items(
+            RDS_ITEMS, OutputFormat.from_path(output_file)
+        )
+    mtime = outputs[0].stat().st_mtime_ns
+    write_output_files(outputs, iter(RDS_ITEMS))
+    assert outputs[0].stat().st_mtime_ns == mtime
+
+    def failing_items() -> Iterator[RdsItem]:
+        yield RDS_ITEMS[0]
+        raise UnsortedItemsError
+
+    with pytest.raises(UnsortedItemsError):
+        write_output_files(outputs, failing_items())
+    # the files are only replaced once all items are written
+    assert read_output_file(outputs[0], RdsItem) == RDS_ITEMS
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["output.json", "output.yaml"]
+
+
+PREVIOUS_ITEMS = [
+    RdsItem(engine="postgres", version="12.2", eol=date(2024, 1, 1)),
+    RdsItem(engine="postgres", version="11.1", eol=date(2025, 1, 1)),
+    RdsItem(engine="postgres", version="10.1", eol=date(2023, 1, 1)),
+    RdsItem(engine="postgres", version="9.6", eol=date(2022, 1, 1)),
+    RdsItem(engine="mysql", version="8", eol=date(2024, 1, 1)),
+]
+NEW_ITEMS = [
+    # changed EOL date
+    RdsItem(engine="postgres", version="11.1", eol=date(2024, 6, 1)),
+    # expired now
+    RdsItem(engine="postgres", version="12.2", eol=date(2022, 6, 1)),
+    RdsItem(engine="postgres", version="13", eol=date(2025, 1, 1)),
+    RdsItem(engine="aurora-postgresql", version="1.0", eol=date(2021, 1, 1)),
+    RdsItem(engine="mysql", version="5.7", eol=date(2024, 1, 1)),
+]
+
+
+def test_item_merge() -> None:
+    expired_date = date(2022, 12, 31)
+    merge = ItemMerge(NEW_ITEMS, expired_date)
+    assert list(merge(PREVIOUS_ITEMS)) == [
+        NEW_ITEMS[2],
+        NEW_ITEMS[0],
+        PREVIOUS_ITEMS[2],
+        PREVIOUS_ITEMS[4],
+        NEW_ITEMS[4],
+    ]
+    assert merge.changes.added == [NEW_ITEMS[2], NEW_ITEMS[4]]
+    assert merge.changes.removed == [PREVIOUS_ITEMS[0], PREVIOUS_ITEMS[3]]
+    assert merge.changes.changed == [(PREVIOUS_ITEMS[1], NEW_ITEMS[0])]
+    # by unique key
+    assert merge.merged == 8  # ruff: ignore[magic-value-comparison]
+    assert merge.expired == 3  # ruff: ignore[magic-value-comparison]
+
+    with pytest.raises(UnsortedItemsError):
+        list(merge(PREVIOUS_ITEMS[::-1]))
+
+
+def test_item_merge_duplicates() -> None:
+    previous = [
+        VersionItem(version="8.0", eol=date(2024, 1, 1)),
+        VersionItem(version="8.0", eol=date(2025, 1, 1)),
+        VersionItem(version="5.7", eol=date(2024, 1, 1)),
+    ]
+    merge: ItemMerge[VersionItem] = ItemMerge([], date(2022, 12, 31))
+    # the last duplicate wins, like when loading the items into a dict
+    assert list(merge(previous)) == previous[1:]
+    assert merge.merged == 2  # ruff: ignore[magic-value-comparison]
+
+
+def test_merge_output_files_unsorted(tmp_path: Path) -> None:
+    outputs = [tmp_path / "output.yaml", tmp_path / "output.jsonl"]
+    # e.g. edited by hand
+    write_output_files([outputs[0]], PREVIOUS_ITEMS[::-1])
+    merge = ItemMerge(NEW_ITEMS, date(2022, 12, 31))
+    expected = list(merge(PREVIOUS_ITEMS))
+    collected: list[RdsItem] = []
+    merge_output_files(outputs, RdsItem, merge, collect=collected)
+    assert collected == expected
+    # streamed the second time
+    collected = []
+    merge_output_files(outputs, RdsItem, merge, collect=collected)
+    assert collected == expected
+    for output_file in outputs:
+        assert read_output_file(output_file, RdsItem) == expected
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        # truncated
+        "---\n- engine: postgres\n  eol: 2024-01-01\n  version: '12\n",
+        "- engine: postgres\n  eol: not a date\n  version: '12'\n",
+    ],
+)
+def test_merge_output_files_invalid(tmp_path: Path, content: str) -> None:
+    output_file = tmp_path / "output.yaml"
+    output_file.write_text(content)
+    with pytest.raises(ValueError, match="Failed to load"):
+        merge_output_files(
+            [output_file], RdsItem, ItemMerge(NEW_ITEMS, date(2022, 12, 31))
+        )
+    # the history isn't replaced by the new items
+    assert output_file.read_text() == content
+    assert [p.name for p in tmp_path.iterdir()] == ["output.yaml"]
+
+
+def test_write_sharded_output(tmp_path: Path) -> None:
+    output_file = tmp_path / "output.yaml"
+    items = sort_items([
+        *RDS_ITEMS,
+        RdsItem(engine="foobar", version="2.0", eol=date(2022, 1, 1)),
+    ])
+    shard_key = attrgetter("engine")
+    assert write_sharded_output(output_file, items, shard_key) == [
+        "something-else.yaml",
+        "foobar.yaml",
+    ]
+    manifest = read_shard_manifest(output_file)
+    assert manifest["foobar.yaml"].items == 2  # ruff: ignore[magic-value-comparison]
+    assert manifest["foobar.yaml"].min_eol == date(2021, 1, 1)
+    shard_file = tmp_path / "output" / "foobar.yaml"
+    assert manifest["foobar.yaml"].sha256 == (
+        hashlib.sha256(shard_file.read_bytes()).hexdigest()
+    )
+    assert shard_file.read_bytes() == dump_items(items[1:], OutputFormat.YAML)
+    # the shards are read in the order of their file names
+    assert sort_items(read_output_file(output_file, RdsItem)) == items
+    assert read_output_file(output_file, RdsItem, shards={"foobar"}) == items[1:]
+
+    # unchanged shards are not rewritten
+    assert not write_sharded_output(output_file, items, shard_key)
+    # an empty shard is removed only if it was loaded
+    assert not write_sharded_output(output_file, items[:1], shard_key, loaded=[])
+    assert write_sharded_output(output_file, items[:1], shard_key) == ["foobar.yaml"]
+    assert not shard_file.exists()
+    assert read_output_file(output_file, RdsItem) == items[:1]
+
+
+def test_write_sharded_output_invalid_name(tmp_path: Path) -> None:
+    item = RdsItem(engine="../foobar", version="1.0", eol=date(2021, 1, 1))
+    with pytest.raises(ValueError, match="Invalid shard name"):
+        write_sharded_output(tmp_path / "output.yaml", [item], attrgetter("engine"))
+
+
 @pytest.mark.parametrize(
     ("version", "eol", "expected"),
     [
@@ -276,15 +500,43 @@ def test_write_output_file(tmp_path: Path) -> None:
     ],
 )
 def test_version_item(version: str, eol: date, expected: VersionItem) -> None:
-    assert VersionItem(version=version, eol=eol) == expected
+    assert validate_items(VersionItem, [{"version": version, "eol": eol}]) == [expected]
 
 
 def test_version_item_msk() -> None:
-    assert VersionItem(version="3.7.x", eol=date(2026, 2, 28)).version == "3.7.x"
-    assert (
-        VersionItem(version="2.8.1.4-tiered", eol=date(2026, 2, 28)).version
-        == "2.8.1.4-tiered"
+    assert normalize_version("3.7.x") == "3.7.x"
+    assert normalize_version("2.8.1.4-tiered") == "2.8.1.4-tiered"
+
+
+def test_validate_items() -> None:
+    items = validate_items(
+        RdsItem,
+        [
+            {"engine": "postgres", "version": "17.4*", "eol": "2026-03-31"},
+            {"engine": "mysql", "version": "8.0.41", "eol": date(2026, 7, 31)},
+        ],
     )
+    assert items == [
+        RdsItem(engine="postgres", version="17.4", eol=date(2026, 3, 31)),
+        RdsItem(engine="mysql", version="8.0.41", eol=date(2026, 7, 31)),
+    ]
+    assert items[0].sort_key == ("postgres", ((17, 4), ""))
+    # the records are slotted and immutable
+    with pytest.raises(FrozenInstanceError):
+        items[0].version = "17.5"  # type: ignore[misc]
+    with pytest.raises(ValidationError):
+        validate_items(
+            VersionItem, [{"version": "no version", "eol": date(2026, 7, 31)}]
+        )
+
+
+def test_write_output_file_items(tmp_path: Path) -> None:
+    output_file = tmp_path / "output.yaml"
+    write_output_files([output_file], [])
+    assert read_output_file(output_file, RdsItem) == []
+    write_output_files([output_file], RDS_ITEMS)
+    # the sort key isn't serialized
+    assert "sort_key" not in output_file.read_text()
 
 
 @pytest.mark.parametrize(
@@ -335,3 +587,155 @@ def test_version_item_msk() -> None:
 )
 def test_version_item_compare(version1: VersionItem, version2: VersionItem) -> None:
     assert version1 == version2
+
+
+@pytest.fixture
+def reset_http() -> Iterator[None]:
+    yield
+    configure_http_cache(None)
+    configure_http_session()
+
+
+@pytest.mark.usefixtures("reset_http")
+def test_http_get_cache(tmp_path: Path, requests_mock: requests_mock.Mocker) -> None:
+    cache = configure_http_cache(tmp_path)
+    assert cache
+    requests_mock.get(
+        "https://example.com",
+        [
+            {"text": "data", "headers": {"etag": '"v1"'}},
+            {"status_code": 304},
+        ],
+    )
+    assert http_get("https://example.com") == "data"
+    assert http_get("https://example.com") == "data"
+    first, second = requests_mock.request_history
+    assert "if-none-match" not in first.headers
+    assert second.headers["if-none-match"] == '"v1"'
+    assert (cache.hits, cache.misses, cache.bytes_saved) == (1, 1, 4)
+
+
+@pytest.mark.usefixtures("reset_http")
+def test_http_get_cache_without_validators(
+    tmp_path: Path, requests_mock: requests_mock.Mocker
+) -> None:
+    cache = configure_http_cache(tmp_path)
+    assert cache
+    requests_mock.get("https://example.com", [{"text": "old"}, {"text": "new"}])
+    assert http_get("https://example.com") == "old"
+    assert http_get("https://example.com") == "new"
+    assert "if-none-match" not in requests_mock.request_history[-1].headers
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+@pytest.mark.usefixtures("reset_http")
+def test_http_get_shared_session(requests_mock: requests_mock.Mocker) -> None:
+    requests_mock.get("https://example.com", text="data")
+    assert http_get("https://example.com") == "data"
+    assert requests_mock.last_request
+    assert requests_mock.last_request.headers["user-agent"] == "curl/8.6.0"
+    assert get_session() is get_session()
+
+
+STREAMED_PAGE = '<h2 id="sec">s</h2><table><tr><td>1</td></tr></table>'
+
+
+@pytest.mark.usefixtures("reset_http")
+def test_http_get_stream(
+    requests_mock: requests_mock.Mocker, caplog: pytest.LogCaptureFixture
+) -> None:
+    page = STREAMED_PAGE + "<p>more</p>" * 100_000
+    requests_mock.get(
+        "https://example.com",
+        text=page,
+        headers={"content-length": str(len(page))},
+    )
+    configure_http_session(stream_pages=True)
+    with caplog.at_level("INFO"):
+        assert (
+            http_get("https://example.com", until=TableScanner(1, "sec"))
+            == STREAMED_PAGE
+        )
+    assert "bytes avoided" in caplog.text
+    # without until, the whole page is downloaded
+    assert http_get("https://example.com") == page
+
+
+@pytest.mark.usefixtures("reset_http")
+def test_http_get_stream_with_cache(
+    tmp_path: Path, requests_mock: requests_mock.Mocker
+) -> None:
+    page = STREAMED_PAGE + "<p>more</p>"
+    requests_mock.get("https://example.com", text=page)
+    configure_http_session(stream_pages=True)
+    configure_http_cache(tmp_path)
+    # the cache needs the whole page
+    assert http_get("https://example.com", until=TableScanner(1, "sec")) == page
+
+
+@pytest.mark.usefixtures("reset_http")
+def test_configure_http_session() -> None:
+    session = configure_http_session(retries=5, backoff_factor=2, timeout=10)
+    assert get_session() is session
+    adapter = session.get_adapter("https://docs.aws.amazon.com")
+    assert isinstance(adapter, HTTPAdapter)
+    assert (adapter.max_retries.total, adapter.max_retries.backoff_factor) == (5, 2)
+
+
+@pytest.mark.parametrize(
+    ("versions", "expected"),
+    [
+        (["17.9", "17.10", "9.6", "17.1"], ["17.10", "17.9", "17.1", "9.6"]),
+        (
+            ["3.7.x", "3.7.1", "3.10.0", "2.8.2-tiered", "2.8.2", "2.8.10"],
+            ["3.10.0", "3.7.x", "3.7.1", "2.8.10", "2.8.2-tiered", "2.8.2"],
+        ),
+        (["1.2", "1.2.0", "1"], ["1.2.0", "1.2", "1"]),
+    ],
+)
+def test_sort_items(versions: list[str], expected: list[str]) -> None:
+    items = [VersionItem(version=v, eol=date(2026, 2, 28)) for v in versions]
+    assert [item.version for item in sort_items(items)] == expected
+
+
+def test_sort_items_rds() -> None:
+    items = [
+        RdsItem(engine="mysql", version="8.0.9", eol=date(2026, 2, 28)),
+        RdsItem(engine="postgres", version="9.6", eol=date(2026, 2, 28)),
+        RdsItem(engine="mysql", version="8.0.41", eol=date(2026, 2, 28)),
+        RdsItem(engine="postgres", version="17.10", eol=date(2026, 2, 28)),
+    ]
+    assert [(item.engine, item.version) for item in sort_items(items)] == [
+        ("postgres", "17.10"),
+        ("postgres", "9.6"),
+        ("mysql", "8.0.41"),
+        ("mysql", "8.0.9"),
+    ]
+    assert sort_items(items) == sorted(items, reverse=True)
+
+
+def test_version_key() -> None:
+    assert version_key("2.8.2-tiered") == ((2, 8, 2), "tiered")
+    assert version_key("17.10") > version_key("17.9")
+
+
+def test_item_merge_changes() -> None:
+    old = [
+        RdsItem(engine="postgres", version="17.1", eol=date(2026, 3, 31)),
+        RdsItem(engine="postgres", version="16.1", eol=date(2025, 3, 31)),
+        RdsItem(engine="mysql", version="8.0.1", eol=date(2026, 3, 31)),
+    ]
+    new = [
+        RdsItem(engine="postgres", version="17.2", eol=date(2026, 3, 31)),
+        RdsItem(engine="postgres", version="17.1", eol=date(2026, 9, 30)),
+        RdsItem(engine="mysql", version="8.0.1", eol=date(2026, 3, 31)),
+    ]
+    merge = ItemMerge(new, date(2025, 12, 31))
+    list(merge(old))
+    changes = merge.changes
+    assert changes.added == [new[0]]
+    assert changes.removed == [old[1]]
+    assert changes.changed == [(old[0], new[1])]
+    unchanged = ItemMerge(old, date(2000, 1, 1))
+    list(unchanged(old))
+    assert not unchanged.changes